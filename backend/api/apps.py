@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from utils import db_stats  # noqa: F401
+        from utils.metrics import connect_query_metrics
+
+        from . import signals  # noqa: F401
+        from .metrics import connect_collectors
+        connect_query_metrics()
+        connect_collectors()
@@ -0,0 +1,93 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, redirect
+from django.views import View
+from rest_framework.response import Response
+
+from common.constants import SUBSCRIBED_IDS
+from recipes.models import Recipe
+from utils.short_link_gen import get_recipe_id
+
+from .mixins import AsyncViewSetMixin
+from .response_cache import aget_cached_response
+from .views import IngredientsView, RecipeViewSet, TagsView
+
+
+async def load_subscribed_ids(request):
+    """fill ids followed by request user, serializers must not query"""
+    if request.user.is_authenticated:
+        setattr(request, SUBSCRIBED_IDS, {
+            pk async for pk in request.user.users_ubscribers.values_list(
+                'subscriber_id', flat=True)
+        })
+
+
+class AsyncReferenceDataMixin(AsyncViewSetMixin):
+    async def list(self, request, *args, **kwargs):
+        return self.get_snapshot_response(
+            request, await self.reference_data.aget_snapshot()
+        )
+
+    async def retrieve(self, request, *args, **kwargs):
+        snapshot = await self.reference_data.aget_snapshot()
+        try:
+            return Response(snapshot.by_id[int(kwargs['pk'])])
+        except (KeyError, ValueError):
+            raise Http404
+
+
+class AsyncTagsView(AsyncReferenceDataMixin, TagsView):
+    pass
+
+
+class AsyncIngredientsView(AsyncReferenceDataMixin, IngredientsView):
+    pass
+
+
+class AsyncRecipeViewSet(AsyncViewSetMixin, RecipeViewSet):
+    """RecipeViewSet with list and retrieve on the async ORM"""
+
+    async def get_filtered_queryset(self):
+        return await sync_to_async(self.filter_queryset)(self.get_queryset())
+
+    async def list(self, request, *args, **kwargs):
+        return await aget_cached_response(
+            self, self.alist, request, *args, **kwargs
+        )
+
+    async def retrieve(self, request, *args, **kwargs):
+        return await aget_cached_response(
+            self, self.aretrieve, request, *args, **kwargs
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.get_filtered_queryset()
+        page = await self.paginator.apaginate_queryset(
+            queryset, request, view=self
+        )
+        await load_subscribed_ids(request)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        queryset = await self.get_filtered_queryset()
+        try:
+            instance = await queryset.aget(pk=kwargs['pk'])
+        except (Recipe.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(request, instance)
+        await load_subscribed_ids(request)
+        return Response(self.get_serializer(instance).data)
+
+
+class AsyncShortLinkRedirectRecipeView(View):
+    async def get(self, request, *args, **kwargs):
+        link = kwargs['slug']
+        if (recipe_id := get_recipe_id(link)) is not None:
+            recipe = await aget_object_or_404(Recipe, pk=recipe_id)
+        else:
+            recipe = await aget_object_or_404(Recipe, short_link=link)
+        url = f'{settings.UBSOLUTE_DOMAIN}/recipes/{recipe.id}/'
+        return redirect(url)
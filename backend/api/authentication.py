@@ -0,0 +1,68 @@
+from time import time_ns
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.authentication import TokenAuthentication
+
+from utils.cache import LRUCache
+from utils.db_router import primary_reads
+
+User = get_user_model()
+
+VERSION_KEY = 'auth:user:{}:version'
+# the only columns authentication and permissions read, the others stay
+# deferred on the cached user and load from the row when touched
+USER_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser')
+
+# token key -> (user id, user version, USER_FIELDS values) in this process,
+# a user change replaces the version in the Django cache, so with a shared
+# backend every worker drops its entries, with LocMemCache only this one
+token_cache = LRUCache(
+    maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL
+)
+
+
+def evict_users(user_ids):
+    """new versions for users, their cached tokens miss in every worker"""
+    version = time_ns()
+    cache.set_many({
+        VERSION_KEY.format(user_id): version for user_id in user_ids
+    }, settings.TOKEN_CACHE_TTL)
+
+
+def build_user(values):
+    field_names = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in USER_FIELDS
+    ]
+    return User.from_db(
+        DEFAULT_DB_ALIAS, field_names,
+        [values[name] for name in field_names]
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication skipping the token query for cached keys"""
+
+    def authenticate_credentials(self, key):
+        if (entry := token_cache.get(key)) is not None:
+            user_id, version, values = entry
+            if cache.get(VERSION_KEY.format(user_id)) == version:
+                user = build_user(values)
+                token = self.get_model()(key=key, user=user)
+                return user, token
+        started = time_ns()
+        # a token issued by login may not have reached replicas yet
+        with primary_reads():
+            user, token = super().authenticate_credentials(key)
+        version = cache.get_or_set(
+            VERSION_KEY.format(user.pk), started, settings.TOKEN_CACHE_TTL
+        )
+        # a newer version means the user changed while the row was read
+        if version <= started:
+            token_cache.set(key, (user.pk, version, {
+                name: getattr(user, name) for name in USER_FIELDS
+            }))
+        return user, token
@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from common.constants import CREATED, EXISTS, ID, NOT_FOUND, SELF, STATUS, USER
+from recipes.counters import count_created
+
+
+@transaction.atomic
+def add_rows(user, row_model, foreign_key, target_model, ids):
+    """
+    Link user to every target in ids with one row_model row each.
+
+    Targets and existing rows are read in one query, new rows are written
+    with one bulk insert, return status of every id in request order.
+    """
+    rows = row_model.objects.filter(
+        user=user, **{foreign_key: OuterRef('pk')}
+    )
+    found = dict(
+        target_model.objects.filter(pk__in=ids)
+        .annotate(linked=Exists(rows)).order_by()
+        .values_list('pk', 'linked')
+    )
+    results = []
+    new_rows = []
+    for pk in ids:
+        if pk not in found:
+            status = NOT_FOUND
+        elif target_model is type(user) and pk == user.pk:
+            status = SELF
+        elif found[pk]:
+            status = EXISTS
+        else:
+            status = CREATED
+            new_rows.append(
+                row_model(**{USER: user, f'{foreign_key}_id': pk})
+            )
+        results.append({ID: pk, STATUS: status})
+    row_model.objects.bulk_create(new_rows, ignore_conflicts=True)
+    count_created(row_model, new_rows)
+    return results
@@ -0,0 +1,376 @@
+import base64
+import random
+from collections import namedtuple
+from io import BytesIO
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from recipes.counters import reconcile_counters
+from recipes.models import (FavoriteRecipes, Ingredient, IngredientsRecipes,
+                            Recipe, ShoppingCart, Tag, TagsRecipes)
+from recipes.search import is_supported, update_search_vector
+from users.models import Subscriber
+from utils.short_link_gen import get_link
+
+from .authentication import token_cache
+from .reference_data import ingredient_index, tags_data
+from .shopping_cart import shopping_list_cache
+
+User = get_user_model()
+
+PASSWORD = 'Benchmark-password-1'
+ANONYMOUS = 'anonymous'
+AUTHENTICATED = 'authenticated'
+USER_TYPES = (ANONYMOUS, AUTHENTICATED)
+# (route, method) of recipe writes followed by the search vector UPDATE,
+# which runs on PostgreSQL only
+SEARCH_UPDATES = {('recipes-list', 'post'), ('recipes-detail', 'patch')}
+
+# budget is the query count allowed for (anonymous, authenticated) calls,
+# data and path are formatted with the benchmark context, save stores
+# a field of the JSON response in the context for the next endpoints,
+# indexes are groups of index names, the plans of the authenticated call
+# must use one index of every group, checked by the PostgreSQL tests
+Endpoint = namedtuple(
+    'Endpoint', 'route method path budget data save token indexes',
+    defaults=(None, None, None, ())
+)
+FAVORITES_INDEXES = (
+    'unique_favorites_user_recipe', 'favorites_recipe_user_idx'
+)
+SHOPPING_CART_INDEXES = (
+    'unique_shopping_cart_user_recipe', 'shopping_cart_recipe_user_idx'
+)
+TAGS_INDEXES = ('unique_tag_recipe',)
+AUTHOR_INDEXES = ('recipe_author_id_idx',)
+SEARCH_INDEXES = ('recipe_search_vector_idx',)
+
+ENDPOINTS = (
+    Endpoint('users-list', 'get', '/api/users/', (2, 3)),
+    Endpoint('users-list', 'post', '/api/users/', (5, 6), data={
+        'email': 'new{n}@example.com', 'username': 'new{n}',
+        'first_name': 'Новый', 'last_name': 'Пользователь',
+        'password': PASSWORD,
+    }),
+    Endpoint('users-detail', 'get', '/api/users/{author}/', (1, 2)),
+    Endpoint('users-me', 'get', '/api/users/me/', (0, 1)),
+    Endpoint('users-subscriptions', 'get',
+             '/api/users/subscriptions/?recipes_limit=3', (0, 4)),
+    Endpoint('users-subscribe', 'post', '/api/users/{other}/subscribe/',
+             (0, 12)),
+    Endpoint('users-subscribe', 'delete', '/api/users/{other}/subscribe/',
+             (0, 10)),
+    Endpoint('users-subscribe-batch', 'post', '/api/users/subscribe/',
+             (0, 8), data={'users': '{batch_users}'}),
+    Endpoint('users-change-avatar', 'put', '/api/users/me/avatar/', (0, 3),
+             data={'avatar': '{image}'}),
+    Endpoint('users-change-avatar', 'delete', '/api/users/me/avatar/',
+             (0, 3)),
+    Endpoint('tags-list', 'get', '/api/tags/', (1, 2)),
+    Endpoint('tags-detail', 'get', '/api/tags/{tag}/', (1, 2)),
+    Endpoint('ingredients-list', 'get', '/api/ingredients/', (1, 2)),
+    Endpoint('ingredients-list', 'get', '/api/ingredients/?name=ингр',
+             (1, 2)),
+    Endpoint('ingredients-detail', 'get', '/api/ingredients/{ingredient}/',
+             (1, 2)),
+    Endpoint('recipes-list', 'get', '/api/recipes/', (4, 6)),
+    Endpoint('recipes-list', 'get', '/api/recipes/?page=3&limit=20',
+             (4, 6)),
+    Endpoint('recipes-list', 'get', '/api/recipes/?cursor=&limit=20',
+             (3, 5)),
+    Endpoint('recipes-list', 'get', '/api/recipes/?author={author}',
+             (4, 6), indexes=(AUTHOR_INDEXES,)),
+    Endpoint('recipes-list', 'get', '/api/recipes/?tags={tag_slug}',
+             (5, 7), indexes=(TAGS_INDEXES,)),
+    Endpoint('recipes-list', 'get',
+             '/api/recipes/?tags={tag_slug}&author={author}', (5, 7)),
+    Endpoint('recipes-list', 'get', '/api/recipes/?is_favorited=1',
+             (4, 6), indexes=(FAVORITES_INDEXES,)),
+    Endpoint('recipes-list', 'get', '/api/recipes/?is_in_shopping_cart=1',
+             (4, 6), indexes=(SHOPPING_CART_INDEXES,)),
+    Endpoint('recipes-list', 'get',
+             '/api/recipes/?is_favorited=1&is_in_shopping_cart=1', (4, 6)),
+    Endpoint('recipes-list', 'get',
+             '/api/recipes/?search=ингредиент&tags={tag_slug}', (5, 7),
+             indexes=(SEARCH_INDEXES,)),
+    Endpoint('recipes-list', 'post', '/api/recipes/', (0, 18), data={
+        'name': 'Новый рецепт {n}', 'text': 'Описание', 'cooking_time': 10,
+        'image': '{image}', 'tags': ['{tag}'],
+        'ingredients': [{'id': '{ingredient}', 'amount': 5}],
+    }, save={'id': 'new_recipe'}),
+    Endpoint('recipes-detail', 'get', '/api/recipes/{recipe}/', (3, 5)),
+    Endpoint('recipes-detail', 'patch', '/api/recipes/{new_recipe}/',
+             (0, 15), data={
+                 'name': 'Изменённый рецепт {n}', 'text': 'Описание',
+                 'cooking_time': 15, 'tags': ['{tag}'],
+                 'ingredients': [{'id': '{ingredient}', 'amount': 7}],
+             }),
+    Endpoint('recipes-detail', 'delete', '/api/recipes/{new_recipe}/',
+             (0, 15)),
+    Endpoint('recipes-get-link', 'get', '/api/recipes/{recipe}/get-link/',
+             (1, 2)),
+    Endpoint('recipes-add-favorite', 'post',
+             '/api/recipes/{recipe}/favorite/', (0, 9)),
+    Endpoint('recipes-add-favorite', 'delete',
+             '/api/recipes/{recipe}/favorite/', (0, 8)),
+    Endpoint('recipes-add-shoping-cart', 'post',
+             '/api/recipes/{recipe}/shopping_cart/', (0, 9)),
+    Endpoint('recipes-add-shoping-cart', 'delete',
+             '/api/recipes/{recipe}/shopping_cart/', (0, 8)),
+    Endpoint('recipes-add-favorite-batch', 'post', '/api/recipes/favorite/',
+             (0, 6), data={'recipes': '{batch_recipes}'}),
+    Endpoint('recipes-add-shoping-cart-batch', 'post',
+             '/api/recipes/shopping_cart/', (0, 6),
+             data={'recipes': '{batch_recipes}'}),
+    Endpoint('recipes-feed', 'get', '/api/recipes/feed/', (0, 7)),
+    Endpoint('recipes-download-shopping-cart', 'get',
+             '/api/recipes/download_shopping_cart/', (0, 2)),
+    Endpoint('recipes-shopping-cart-cache-stats', 'get',
+             '/api/recipes/download_shopping_cart/stats/', (0, 1)),
+    Endpoint('db_stats', 'get', '/api/stats/db/', (0, 1)),
+    Endpoint('login', 'post', '/api/auth/token/login/', (6, 4), data={
+        'email': '{login_email}', 'password': PASSWORD,
+    }, save={'auth_token': 'login_token'}),
+    Endpoint('logout', 'post', '/api/auth/token/logout/', (0, 5),
+             token='login_token'),
+    Endpoint('short_link', 'get', '/s/{link}/', (1, 2)),
+    Endpoint('metrics', 'get', '/metrics/', (0, 0)),
+)
+
+# account management routes of djoser, not used by the frontend
+SKIPPED = (
+    'users-activation', 'users-resend-activation', 'users-reset-password',
+    'users-reset-password-confirm', 'users-reset-username',
+    'users-reset-username-confirm', 'users-set-password',
+    'users-set-username', 'api-root',
+)
+
+
+def iter_route_names(patterns, prefix=''):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            namespace = pattern.namespace or prefix
+            yield from iter_route_names(pattern.url_patterns, namespace)
+        elif pattern.name:
+            yield prefix, pattern.name
+
+
+def get_uncovered_routes():
+    """return names of api routes the benchmark does not call"""
+    names = {
+        name for namespace, name in iter_route_names(
+            get_resolver().url_patterns)
+        if namespace in ('', 'api_v1')
+    }
+    covered = {endpoint.route for endpoint in ENDPOINTS}
+    return sorted(names - covered - set(SKIPPED))
+
+
+def make_image():
+    buffer = BytesIO()
+    Image.new('RGB', (64, 48), (200, 120, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def seed(users=50, recipes=300, ingredients=1000, tags=6, seed_value=1):
+    """fill an empty database, return context for endpoint paths"""
+    generator = random.Random(seed_value)
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        User(
+            email=f'user{i}@example.com', username=f'user{i}',
+            first_name='Имя', last_name='Фамилия', password=password
+        ) for i in range(users)
+    )
+    user_objects = list(User.objects.order_by('id'))
+    main_user, login_user = user_objects[:2]
+    main_user.is_staff = True
+    main_user.save(update_fields=['is_staff'])
+    Tag.objects.bulk_create(
+        Tag(name=f'Тег {i}', slug=f'tag{i}') for i in range(tags)
+    )
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {i}', measurement_unit='г')
+        for i in range(ingredients)
+    )
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    image = default_storage.save(
+        'recipes/images/benchmark.png', ContentFile(make_image())
+    )
+    Recipe.objects.bulk_create(
+        Recipe(
+            name=f'Рецепт {i}', text='Описание рецепта ' * 20,
+            cooking_time=generator.randint(5, 120), image=image,
+            author=generator.choice(user_objects[2:])
+        ) for i in range(recipes)
+    )
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    TagsRecipes.objects.bulk_create(
+        TagsRecipes(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in generator.sample(tag_ids, 2)
+    )
+    IngredientsRecipes.objects.bulk_create(
+        IngredientsRecipes(
+            recipe_id=recipe_id, ingredient_id=ingredient_id,
+            amount=generator.randint(1, 500)
+        )
+        for recipe_id in recipe_ids
+        for ingredient_id in generator.sample(ingredient_ids, 8)
+    )
+    update_search_vector(Recipe.objects.all())
+    for model in (FavoriteRecipes, ShoppingCart):
+        model.objects.bulk_create(
+            model(user=user, recipe_id=recipe_id)
+            for user in user_objects
+            for recipe_id in generator.sample(recipe_ids, 10)
+        )
+    authors = user_objects[2:]
+    Subscriber.objects.bulk_create(
+        Subscriber(user=user, subscriber=author)
+        for user in user_objects
+        for author in generator.sample(authors, 10) if author != user
+    )
+    reconcile_counters()
+    followed = set(main_user.users_ubscribers.values_list(
+        'subscriber_id', flat=True))
+    recipe, *batch_recipes = Recipe.objects.exclude(
+        favorite_recipes__user=main_user
+    ).exclude(shopping_cart__user=main_user)[:11]
+    author = next(user for user in authors if user.pk in followed)
+    other, *batch_users = [
+        user.pk for user in authors if user.pk not in followed
+    ][:11]
+    return {
+        'main_user': main_user,
+        'author': author.pk,
+        'other': other,
+        'batch_users': batch_users,
+        'batch_recipes': [item.pk for item in batch_recipes],
+        'recipe': recipe.pk,
+        'link': get_link(recipe.pk),
+        'tag': tag_ids[0],
+        'tag_slug': Tag.objects.get(pk=tag_ids[0]).slug,
+        'ingredient': ingredient_ids[0],
+        'login_email': login_user.email,
+        'image': 'data:image/png;base64,' + base64.b64encode(
+            make_image()).decode(),
+        'token': Token.objects.create(user=main_user).key,
+        'n': 0,
+    }
+
+
+class SkipTasks:
+    """
+    Stand-in for the image variants executor.
+
+    Variants are rendered off the request path, in the benchmark they
+    would only compete with requests for the database.
+    """
+
+    def submit(self, *args, **kwargs):
+        pass
+
+
+def clear_caches():
+    """measure every call without process and shared caches"""
+    cache.clear()
+    tags_data.invalidate()
+    ingredient_index.invalidate()
+    shopping_list_cache.clear()
+    token_cache.clear()
+
+
+def format_value(value, context):
+    if isinstance(value, str):
+        if value.startswith('{') and value.endswith('}') and not isinstance(
+                context.get(value[1:-1], ''), str):
+            return context[value[1:-1]]
+        return value.format(**context)
+    if isinstance(value, dict):
+        return {key: format_value(item, context)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [format_value(item, context) for item in value]
+    return value
+
+
+def get_budget(endpoint, user_type):
+    """queries of endpoint calls on the current database"""
+    budget = endpoint.budget[USER_TYPES.index(user_type)]
+    if (user_type == AUTHENTICATED and not is_supported()
+            and (endpoint.route, endpoint.method) in SEARCH_UPDATES):
+        budget -= 1
+    return budget
+
+
+def request(endpoint, context, user_type):
+    """make one request, return (response, captured queries, seconds)"""
+    context['n'] += 1
+    headers = {}
+    if user_type == AUTHENTICATED:
+        token = context.get(endpoint.token or 'token', '')
+        headers['Authorization'] = f'Token {token}'
+    client = Client(headers=headers)
+    path = endpoint.path.format(**context)
+    kwargs = {}
+    if endpoint.data is not None:
+        kwargs = {
+            'data': format_value(endpoint.data, context),
+            'content_type': 'application/json',
+        }
+    clear_caches()
+    with CaptureQueriesContext(connection) as queries:
+        started = perf_counter()
+        response = getattr(client, endpoint.method)(path, **kwargs)
+        elapsed = perf_counter() - started
+    if (endpoint.save and user_type == AUTHENTICATED
+            and response.status_code < 300):
+        for field, key in endpoint.save.items():
+            context[key] = response.json()[field]
+    return response, queries.captured_queries, elapsed
+
+
+def call(endpoint, context, user_type):
+    """make one request, return (status, queries, seconds)"""
+    response, queries, elapsed = request(endpoint, context, user_type)
+    return response.status_code, len(queries), elapsed
+
+
+def get_plans(queries):
+    """
+    EXPLAIN captured SELECTs with sequential scans disabled.
+
+    Benchmark tables are small enough for the planner to prefer seq
+    scans, disabling them shows whether a usable index exists.
+    """
+    plans = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        for query in queries:
+            if query['sql'].startswith('SELECT'):
+                cursor.execute(f'EXPLAIN {query["sql"]}')
+                plans.append('\n'.join(row[0] for row in cursor.fetchall()))
+    return plans
+
+
+def get_missing_indexes(endpoint, context):
+    """index groups of endpoint none of which its plans use"""
+    _, queries, _ = request(endpoint, context, AUTHENTICATED)
+    plans = '\n'.join(get_plans(queries))
+    return [
+        names for names in endpoint.indexes
+        if not any(name in plans for name in names)
+    ]
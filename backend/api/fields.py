@@ -0,0 +1,71 @@
+from django import forms
+from django.conf import settings
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+
+from common.constants import (BATCH_MAX_SIZE, IMAGE, JPG, ORIGINAL, REQUEST,
+                              WEBP)
+from utils.images import SOURCE, get_variant_key
+
+
+class UploadImageField(Base64ImageField):
+    """
+    Base64 image checked by its signature only.
+
+    Decoding the whole image is left to the background variants worker,
+    so large uploads are stored as-is without blocking the request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('_DjangoImageField', forms.FileField)
+        super().__init__(*args, **kwargs)
+
+
+class ImageVariantField(serializers.Field):
+    """
+    Url of a resized image variant.
+
+    ?image=webp selects WebP variants, ?image=original the uploaded
+    file. The original is also used until its variants are rendered.
+    """
+
+    def __init__(self, variant, image_field=IMAGE, variants_field=None,
+                 **kwargs):
+        self.variant = variant
+        self.image_field = image_field
+        self.variants_field = variants_field or f'{image_field}_variants'
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_variant_name(self, obj, image):
+        request = self.context.get(REQUEST)
+        requested = request.query_params.get(IMAGE) if request else None
+        variants = getattr(obj, self.variants_field) or {}
+        if requested == ORIGINAL or variants.get(SOURCE) != image.name:
+            return image.name
+        extension = WEBP if requested == WEBP else JPG
+        return variants.get(
+            get_variant_key(self.variant, extension), image.name
+        )
+
+    def to_representation(self, obj):
+        if not (image := getattr(obj, self.image_field)):
+            return None
+        url = image.storage.url(self.get_variant_name(obj, image))
+        if request := self.context.get(REQUEST):
+            return request.build_absolute_uri(url)
+        return f'{settings.UBSOLUTE_DOMAIN}{url}'
+
+
+class IdListField(serializers.ListField):
+    """Non-empty list of ids with duplicates dropped, order kept."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('child', serializers.IntegerField(min_value=1))
+        kwargs.setdefault('allow_empty', False)
+        kwargs.setdefault('max_length', BATCH_MAX_SIZE)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        return list(dict.fromkeys(super().to_internal_value(data)))
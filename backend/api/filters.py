@@ -1,46 +1,51 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import FavoriteRecipes, Recipe, ShoppingCart, TagsRecipes
+from recipes.search import search
 
+from .reference_data import tags_data
 
-class IngredienFilterSet(filters.FilterSet):
-    name = filters.CharFilter(field_name='name', method='filter_name')
 
-    class Meta:
-        model = Ingredient
-        fields = ['name']
-
-    def filter_name(self, queryset, name, value):
-        value = value.lower()
-        if queryset := queryset.filter(name__istartswith=value):
-            return queryset
-        return self.queryset.filter(name__icontains=value)
+def get_tag_choices():
+    return [(tag.slug, tag.name) for tag in tags_data.all()]
 
 
 class RecipeFilterSet(filters.FilterSet):
     author = filters.NumberFilter(field_name='author_id')
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug', to_field_name='slug',
-        queryset=Tag.objects.all()
+    tags = filters.MultipleChoiceFilter(
+        field_name='tags__slug', choices=get_tag_choices,
+        method='filter_tags'
     )
     is_in_shopping_cart = filters.BooleanFilter(
         field_name='is_in_shopping_cart', method='filter_is_in_shopping_cart')
     is_favorited = filters.BooleanFilter(
         field_name='is_favorited', method='filter_is_favorited'
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
         fields = ['tags', 'author']
 
-    def filter_is_in_shopping_cart(self, queryset, name, value):
+    def filter_tags(self, queryset, name, value):
+        tag_ids = [tag.id for tag in tags_data.all() if tag.slug in value]
+        return queryset.filter(Exists(TagsRecipes.objects.filter(
+            tag_id__in=tag_ids, recipe=OuterRef('pk'))))
+
+    def filter_user_rows(self, queryset, model, value):
         if not value or not self.request.user.is_authenticated:
             return queryset
-        return queryset.filter(
-            shopping_cart__user=self.request.user).distinct()
+        return queryset.filter(Exists(model.objects.filter(
+            user=self.request.user, recipe=OuterRef('pk'))))
+
+    def filter_is_in_shopping_cart(self, queryset, name, value):
+        return self.filter_user_rows(queryset, ShoppingCart, value)
 
     def filter_is_favorited(self, queryset, name, value):
-        if not value or not self.request.user.is_authenticated:
+        return self.filter_user_rows(queryset, FavoriteRecipes, value)
+
+    def filter_search(self, queryset, name, value):
+        if not (value := value.strip()):
             return queryset
-        return queryset.filter(
-            favorite_recipes__user=self.request.user).distinct()
+        return search(queryset, value)
@@ -0,0 +1,158 @@
+import json
+import tempfile
+from pathlib import Path
+from statistics import quantiles
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+
+from api.benchmark import (ENDPOINTS, USER_TYPES, SkipTasks, call, get_budget,
+                           get_uncovered_routes, seed)
+from utils import images
+
+
+def get_percentiles(timings):
+    points = quantiles(timings, n=100, method='inclusive')
+    return {
+        'p50': round(points[49] * 1000, 2),
+        'p95': round(points[94] * 1000, 2),
+        'p99': round(points[98] * 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Call every API route as anonymous and authenticated user on a '
+        'throwaway database filled with generated data, check query '
+        'budgets and compare latency with the JSON baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--recipes', type=int, default=300)
+        parser.add_argument('--ingredients', type=int, default=1000)
+        parser.add_argument(
+            '--baseline', default=str(settings.BASE_DIR / 'benchmark.json'),
+            help='Latency baseline file'
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Write measured latencies as the new baseline'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.5,
+            help='Allowed p50 slowdown against baseline, 0.5 is 50%%'
+        )
+        parser.add_argument(
+            '--min-delta', type=float, default=2,
+            help='Slowdowns below this many milliseconds are ignored'
+        )
+
+    def handle(self, *args, **options):
+        if uncovered := get_uncovered_routes():
+            raise CommandError(
+                f'Routes without benchmark endpoint: {", ".join(uncovered)}'
+            )
+        results = self.run(options)
+        failures = self.check_budgets(results)
+        baseline_path = Path(options['baseline'])
+        if options['update_baseline']:
+            baseline_path.write_text(
+                json.dumps(results, indent=2, ensure_ascii=False) + '\n'
+            )
+            self.stdout.write(f'Baseline written to {baseline_path}')
+        elif baseline_path.exists():
+            failures += self.compare(
+                results, json.loads(baseline_path.read_text()), options
+            )
+        else:
+            self.stdout.write(f'No baseline at {baseline_path}')
+        if failures:
+            raise CommandError(
+                'Performance budget exceeded:\n' + '\n'.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget'))
+
+    def run(self, options):
+        setup_test_environment()
+        executor, images.executor = images.executor, SkipTasks()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(
+                        MEDIA_ROOT=media_root, DB_REPLICAS=[],
+                        PASSWORD_HASHERS=[
+                            'django.contrib.auth.hashers.MD5PasswordHasher'
+                        ]):
+                context = seed(
+                    users=options['users'], recipes=options['recipes'],
+                    ingredients=options['ingredients']
+                )
+                return self.measure(context, options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            images.executor = executor
+            teardown_test_environment()
+
+    def measure(self, context, iterations):
+        queries = {}
+        timings = {}
+        statuses = {}
+        for _ in range(iterations):
+            for endpoint in ENDPOINTS:
+                for user_type in USER_TYPES:
+                    key = self.get_key(endpoint, user_type)
+                    status, count, elapsed = call(endpoint, context, user_type)
+                    queries[key] = max(queries.get(key, 0), count)
+                    timings.setdefault(key, []).append(elapsed)
+                    statuses.setdefault(key, set()).add(status)
+        return {
+            key: {
+                'status': sorted(statuses[key]),
+                'queries': queries[key],
+                **get_percentiles(timings[key]),
+            }
+            for key in timings
+        }
+
+    def get_key(self, endpoint, user_type):
+        return f'{endpoint.method.upper()} {endpoint.path} {user_type}'
+
+    def check_budgets(self, results):
+        failures = []
+        for endpoint in ENDPOINTS:
+            for user_type in USER_TYPES:
+                budget = get_budget(endpoint, user_type)
+                key = self.get_key(endpoint, user_type)
+                result = results[key]
+                self.stdout.write(
+                    f'{key:75} {result["status"]} '
+                    f'queries {result["queries"]}/{budget} '
+                    f'p50 {result["p50"]}ms p95 {result["p95"]}ms'
+                )
+                if result['queries'] > budget:
+                    failures.append(
+                        f'{key}: {result["queries"]} queries, '
+                        f'budget {budget}'
+                    )
+                if any(status >= 500 for status in result['status']):
+                    failures.append(f'{key}: server error')
+        return failures
+
+    def compare(self, results, baseline, options):
+        failures = []
+        for key, result in results.items():
+            if key not in baseline:
+                continue
+            before = baseline[key]['p50']
+            after = result['p50']
+            if (after > before * (1 + options['tolerance'])
+                    and after - before > options['min_delta']):
+                failures.append(f'{key}: p50 {after}ms, baseline {before}ms')
+        return failures
@@ -0,0 +1,146 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+from time import perf_counter, sleep
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Ingredient, Recipe, Tag
+
+from .benchmark_api import get_percentiles
+
+MODES = ('wsgi', 'asgi')
+# anonymous hot reads, the ones served by async views in asgi mode
+PATHS = (
+    '/api/recipes/',
+    '/api/recipes/?limit=6&page=2',
+    '/api/recipes/?tags={tag}',
+    '/api/recipes/{recipe}/',
+    '/api/tags/',
+    '/api/ingredients/?name={ingredient}',
+)
+START_TIMEOUT = 30
+
+
+class Command(BaseCommand):
+    help = (
+        'Start gunicorn in wsgi and asgi server mode on the configured '
+        'database, send concurrent anonymous reads and compare throughput '
+        'per worker'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', choices=MODES,
+                            default=list(MODES))
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--port', type=int, default=8100)
+        parser.add_argument(
+            '--cached', action='store_true',
+            help='Keep the recipes response cache, off by default so the '
+                 'views and the database are measured'
+        )
+
+    def handle(self, *args, **options):
+        paths = self.get_paths()
+        results = {}
+        for mode in options['modes']:
+            server = self.start(mode, options)
+            try:
+                results[mode] = self.load(paths, options)
+            finally:
+                server.terminate()
+                server.wait()
+            self.report(mode, results[mode], options)
+        if len(results) == len(MODES):
+            wsgi, asgi = (results[mode]['rps'] for mode in MODES)
+            self.stdout.write(f'asgi/wsgi throughput: {asgi / wsgi:.2f}')
+
+    def get_paths(self):
+        recipe = Recipe.objects.values_list('id', flat=True).first()
+        tag = Tag.objects.values_list('slug', flat=True).first()
+        ingredient = Ingredient.objects.values_list('name', flat=True).first()
+        if None in (recipe, tag, ingredient):
+            raise CommandError('Database needs recipes, tags and ingredients')
+        return [
+            path.format(
+                recipe=recipe, tag=tag, ingredient=quote(ingredient[:3])
+            )
+            for path in PATHS
+        ]
+
+    def get_url(self, options, path):
+        return f'http://127.0.0.1:{options["port"]}{path}'
+
+    def get(self, url):
+        host = settings.ALLOWED_HOSTS[0]
+        request = Request(url, headers={
+            'Host': 'localhost' if host == '*' else host.lstrip('.')
+        })
+        started = perf_counter()
+        try:
+            with urlopen(request) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        return status, perf_counter() - started
+
+    def start(self, mode, options):
+        env = {
+            **os.environ, 'SERVER_MODE': mode,
+            'GUNICORN_WORKERS': str(options['workers']),
+        }
+        if not options['cached']:
+            env['RECIPES_CACHE_TIMEOUT'] = '0'
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+             '--bind', f'127.0.0.1:{options["port"]}'],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        url = self.get_url(options, '/api/tags/')
+        deadline = perf_counter() + START_TIMEOUT
+        while perf_counter() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'{mode} server exited on start')
+            try:
+                self.get(url)
+                return server
+            except (URLError, ConnectionError):
+                sleep(0.2)
+        server.terminate()
+        server.wait()
+        raise CommandError(f'{mode} server did not start')
+
+    def load(self, paths, options):
+        urls = [self.get_url(options, path) for path in paths]
+        # warm up every worker before measuring
+        for url in urls * options['workers']:
+            self.get(url)
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            started = perf_counter()
+            calls = list(executor.map(
+                self.get, islice(cycle(urls), options['requests'])
+            ))
+            elapsed = perf_counter() - started
+        return {
+            'rps': len(calls) / elapsed,
+            'errors': sum(status >= 400 for status, _ in calls),
+            **get_percentiles([seconds for _, seconds in calls]),
+        }
+
+    def report(self, mode, result, options):
+        self.stdout.write(
+            f'{mode}: {result["rps"]:.1f} req/s, '
+            f'{result["rps"] / options["workers"]:.1f} per worker, '
+            f'p50 {result["p50"]}ms p95 {result["p95"]}ms '
+            f'p99 {result["p99"]}ms, errors {result["errors"]}'
+        )
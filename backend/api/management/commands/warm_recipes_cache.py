@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from api.views import RecipeViewSet
+from recipes.models import Recipe, Tag
+from utils.cache import is_process_local
+
+
+class Command(BaseCommand):
+    help = 'Fill the anonymous recipes response cache with popular pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host', default=settings.DOMAIN,
+            help='Host header the pages are rendered for'
+        )
+        parser.add_argument('--pages', type=int, default=3)
+        parser.add_argument(
+            '--limit', type=int, default=settings.REST_FRAMEWORK['PAGE_SIZE']
+        )
+        parser.add_argument(
+            '--recipes', type=int, default=50,
+            help='Number of most favorited recipes to warm'
+        )
+
+    def handle(self, *args, **options):
+        if is_process_local():
+            raise CommandError(
+                'CACHE_BACKEND is local to this process, workers would not '
+                'see the warmed pages. Configure a shared cache, e.g. Redis.'
+            )
+        factory = RequestFactory(HTTP_HOST=options['host'])
+        list_view = RecipeViewSet.as_view({'get': 'list'})
+        detail_view = RecipeViewSet.as_view({'get': 'retrieve'})
+        slugs = list(Tag.objects.values_list('slug', flat=True))
+        tag_sets = [[], slugs] + [[slug] for slug in slugs]
+        warmed = 0
+        for tags in tag_sets:
+            for page in range(1, options['pages'] + 1):
+                response = list_view(factory.get('/api/recipes/', {
+                    'page': page, 'limit': options['limit'], 'tags': tags
+                }))
+                warmed += 1
+                if not response.data.get('next'):
+                    break
+        recipe_ids = Recipe.objects.order_by(
+            '-favorites_count', '-id'
+        ).values_list('id', flat=True)[:options['recipes']]
+        for recipe_id in recipe_ids:
+            detail_view(
+                factory.get(f'/api/recipes/{recipe_id}/'), pk=recipe_id
+            )
+            warmed += 1
+        self.stdout.write(self.style.SUCCESS(f'Warmed {warmed} pages'))
@@ -0,0 +1,64 @@
+from django.http import HttpResponse
+
+from utils.db_router import get_route_stats
+from utils.db_stats import get_all_pool_stats
+from utils.metrics import metrics
+
+from .authentication import token_cache
+from .shopping_cart import shopping_list_cache
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def get_cache_collector(name, lru_cache, help_text):
+    """collector of LRUCache hits, misses and size"""
+
+    def collect():
+        stats = lru_cache.stats()
+        yield f'{name}_hits_total', 'counter', 'Cache hits', [
+            ({}, stats['hits'])
+        ]
+        yield f'{name}_misses_total', 'counter', 'Cache misses', [
+            ({}, stats['misses'])
+        ]
+        yield f'{name}_size', 'gauge', help_text, [({}, stats['size'])]
+
+    return collect
+
+
+def collect_db_connections():
+    pools = get_all_pool_stats()
+    yield 'db_connects_total', 'counter', 'Database connects', [
+        ({'alias': pool['alias']}, pool['connects']) for pool in pools
+    ]
+    for field, help_text in (
+        ('in_use', 'Pool connections in use'),
+        ('waiting', 'Requests waiting for a pool connection'),
+        ('size', 'Open pool connections'),
+    ):
+        yield f'db_pool_{field}', 'gauge', help_text, [
+            ({'alias': pool['alias']}, pool[field])
+            for pool in pools if field in pool
+        ]
+
+
+def collect_db_routes():
+    yield 'db_route_requests_total', 'counter', 'Requests by read route', [
+        ({'route': route}, value)
+        for route, value in get_route_stats().items()
+    ]
+
+
+def connect_collectors():
+    metrics.add_collector(get_cache_collector(
+        'shopping_list_cache', shopping_list_cache, 'Cached lists'
+    ))
+    metrics.add_collector(get_cache_collector(
+        'token_cache', token_cache, 'Cached tokens'
+    ))
+    metrics.add_collector(collect_db_connections)
+    metrics.add_collector(collect_db_routes)
+
+
+def metrics_view(request):
+    return HttpResponse(metrics.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,125 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+
+from utils.cache import is_process_local
+from utils.db_router import (get_route, get_sticky_key, is_safe, is_write,
+                             read_route)
+from utils.metrics import RequestStats, current_stats, metrics
+
+UNRESOLVED = 'unresolved'
+
+
+def get_view_labels(view_func, method):
+    """return view class or function name and viewset action"""
+    method = method.lower()
+    if (view_class := getattr(view_func, 'cls', None)) is None:
+        return view_func.__name__, method
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method)
+    if action is None and method == 'head':
+        action = actions.get('get')
+    return view_class.__name__, action or method
+
+
+def get_response_size(response):
+    if response.streaming:
+        return int(response.get('Content-Length', 0))
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """Count requests, latency, queries and response size per view."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.observe(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.observe(request, response, stats)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_labels = get_view_labels(view_func, request.method)
+
+    def observe(self, request, response, stats):
+        view, action = getattr(
+            request, 'metrics_labels', (UNRESOLVED, UNRESOLVED)
+        )
+        metrics.observe(
+            view, action, request.method, response.status_code, stats,
+            get_response_size(response)
+        )
+
+
+class ReplicaMiddleware:
+    """
+    Route reads of safe requests to a replica.
+
+    A successful write pins its credentials to the primary for
+    DB_STICKY_SECONDS, so the author reads back what they wrote. The
+    sticky flag must be seen by every worker, so a shared cache is required.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DB_REPLICAS:
+            raise MiddlewareNotUsed
+        if is_process_local():
+            raise ImproperlyConfigured(
+                'DB_REPLICA_HOSTS needs a shared CACHE_BACKEND'
+            )
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        key = get_sticky_key(request)
+        sticky = key is not None and is_safe(request) and cache.get(key)
+        token = read_route.set(get_route(request, sticky))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_route.reset(token)
+        if key is not None and is_write(request, response):
+            cache.set(key, True, settings.DB_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        key = get_sticky_key(request)
+        sticky = key is not None and is_safe(request) and await cache.aget(key)
+        token = read_route.set(get_route(request, sticky))
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_route.reset(token)
+        if key is not None and is_write(request, response):
+            await cache.aset(key, True, settings.DB_STICKY_SECONDS)
+        return response
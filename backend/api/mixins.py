@@ -1,12 +1,99 @@
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                quote_etag)
+from django.utils.http import http_date
+from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
-from common.constants import REQUEST
+from common.constants import REQUEST, SUBSCRIBED_IDS
+
+from .response_cache import get_cached_response
 
 
 class ListRetriveMixin(ReadOnlyModelViewSet):
     pagination_class = None
 
 
+class ReferenceDataMixin(ListRetriveMixin):
+    """list from process cache, conditional requests get 304"""
+    reference_data = None
+
+    def get_reference_list(self, snapshot):
+        return snapshot.data
+
+    def list(self, request, *args, **kwargs):
+        return self.get_snapshot_response(
+            request, self.reference_data.get_snapshot()
+        )
+
+    def get_snapshot_response(self, request, snapshot):
+        etag = quote_etag(snapshot.etag)
+        last_modified = int(snapshot.last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = Response(self.get_reference_list(snapshot))
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class AsyncViewSetMixin:
+    """
+    Viewset dispatch for the ASGI server.
+
+    Async actions are awaited on the event loop, the others and the DRF
+    authentication and permission checks run in a worker thread, like
+    Django runs any sync view under ASGI.
+    """
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        return markcoroutinefunction(super().as_view(actions, **initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(
+                self, request.method.lower(), self.http_method_not_allowed
+            )
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(
+                    request, *args, **kwargs
+                )
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return self.response
+
+
+class AnonymousCacheMixin:
+    """cache list and retrieve responses for anonymous users"""
+    cache_query_params = ()
+
+    def list(self, request, *args, **kwargs):
+        return get_cached_response(
+            self, super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return get_cached_response(
+            self, super().retrieve, request, *args, **kwargs
+        )
+
+
 class GetUserMixin:
     def get_user_object(self):
         """return user model object or False"""
@@ -14,3 +101,13 @@ class GetUserMixin:
                 or not self.context[REQUEST].user.is_authenticated):
             return False
         return self.context[REQUEST].user
+
+    def get_subscribed_ids(self):
+        """return ids of users followed by current user, once per request"""
+        request = self.context[REQUEST]
+        if not hasattr(request, SUBSCRIBED_IDS):
+            setattr(request, SUBSCRIBED_IDS, set(
+                request.user.users_ubscribers.values_list(
+                    'subscriber_id', flat=True)
+            ))
+        return getattr(request, SUBSCRIBED_IDS)
@@ -1,11 +1,91 @@
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from common.constants import SEARCH
 
 
 class RecipesPagination(PageNumberPagination):
+    """
+    Page number pagination with an opt-in keyset mode.
+
+    Passing ?cursor= (empty for the first page, then the value from next)
+    seeks on id instead of OFFSET and skips the COUNT query. Filters
+    ordering by something else, like search rank, are page number only.
+    """
     page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
+    ordered_query_params = (SEARCH,)
+    ordered_cursor_message = 'Cursor can not be combined with {param}.'
+
+    def read_params(self, request):
+        self.page_size = self.get_page_size(request)
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        self.request = request
+        if not self.cursor_mode:
+            return
+        for param in self.ordered_query_params:
+            if request.query_params.get(param, '').strip():
+                raise ValidationError({self.cursor_query_param: [
+                    self.ordered_cursor_message.format(param=param)
+                ]})
 
     def paginate_queryset(self, queryset, request, view=None):
-        page_size = request.query_params.get(self.page_size_query_param)
-        if page_size and page_size.isdigit() and int(page_size) > 0:
-            self.page_size = int(page_size)
+        self.read_params(request)
+        if self.cursor_mode:
+            return self.set_cursor_page(
+                list(self.get_cursor_queryset(queryset, request))
+            )
         return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset running count and page queries async"""
+        self.read_params(request)
+        if self.cursor_mode:
+            queryset = self.get_cursor_queryset(queryset, request)
+            return self.set_cursor_page([obj async for obj in queryset])
+        paginator = self.django_paginator_class(queryset, self.page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            ))
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        return self.page.object_list
+
+    def get_cursor_queryset(self, queryset, request):
+        queryset = queryset.order_by('-id')
+        if cursor := request.query_params[self.cursor_query_param]:
+            try:
+                cursor = int(cursor)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(id__lt=cursor)
+        return queryset[:self.page_size + 1]
+
+    def set_cursor_page(self, page):
+        self.has_next = len(page) > self.page_size
+        self.page_items = page[:self.page_size]
+        return self.page_items
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param, self.page_items[-1].id
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return Response({
+                'next': self.get_next_cursor_link(),
+                'results': data,
+            })
+        return super().get_paginated_response(data)
@@ -0,0 +1,143 @@
+import json
+from bisect import bisect_left
+from datetime import datetime, timezone
+from hashlib import sha256
+from threading import Lock
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import cache
+
+from common.constants import ID, NAME
+from recipes.models import Ingredient, Tag
+from utils.cache import LRUCache
+from utils.db_router import primary_reads
+
+from .serializers import IngredientsSerializer, TagsSerializer
+
+SNAPSHOT = 'snapshot'
+VERSION_KEY = 'reference:{}:version'
+
+
+class Snapshot:
+    def __init__(self, objects, data, version):
+        self.objects = objects
+        self.data = data
+        self.version = version
+        self.etag = sha256(
+            json.dumps(data, ensure_ascii=False).encode()
+        ).hexdigest()
+        # the version is the time of the last change, the same in every
+        # worker sharing the cache and across rebuilds
+        self.last_modified = datetime.fromtimestamp(
+            version / 10 ** 9, timezone.utc
+        )
+        self.by_id = {item[ID]: item for item in data}
+
+
+class ReferenceData:
+    """
+    Per-process snapshot of a small, rarely changed table.
+
+    Keeps the rows ordered by id together with their serialized data and
+    an ETag computed from that data. A snapshot is served while its version
+    matches the one in the Django cache, invalidate() replaces that version
+    so every worker sharing the cache rebuilds, the TTL bounds staleness
+    when the cache is process local.
+    """
+
+    def __init__(self, model, serializer_class, ttl):
+        self.model = model
+        self.serializer_class = serializer_class
+        self.version_key = VERSION_KEY.format(model._meta.label_lower)
+        self._cache = LRUCache(maxsize=1, ttl=ttl)
+        self._lock = Lock()
+
+    def get_queryset(self):
+        return self.model.objects.order_by(ID)
+
+    def get_version(self):
+        return cache.get_or_set(self.version_key, time_ns, timeout=None)
+
+    async def aget_version(self):
+        return await cache.aget_or_set(self.version_key, time_ns, timeout=None)
+
+    def get_cached(self, version):
+        snapshot = self._cache.get(SNAPSHOT)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        return None
+
+    def build(self, version, objects=None):
+        if objects is None:
+            # snapshots outlive the request, never build one from a replica
+            with primary_reads():
+                objects = list(self.get_queryset())
+        data = [dict(item) for item in self.serializer_class(
+            objects, many=True).data]
+        return Snapshot(objects, data, version)
+
+    def get_snapshot(self):
+        # the version is read before the rows, a change committed in
+        # between leaves a newer version and the next call rebuilds
+        version = self.get_version()
+        with self._lock:
+            if (snapshot := self.get_cached(version)) is None:
+                snapshot = self.build(version)
+                self._cache.set(SNAPSHOT, snapshot)
+            return snapshot
+
+    async def aget_snapshot(self):
+        """get_snapshot for async views, rows are read with async ORM"""
+        version = await self.aget_version()
+        if (snapshot := self.get_cached(version)) is None:
+            with primary_reads():
+                objects = [obj async for obj in self.get_queryset()]
+            snapshot = self.build(version, objects)
+            self._cache.set(SNAPSHOT, snapshot)
+        return snapshot
+
+    def invalidate(self):
+        """new version, workers sharing the cache rebuild on next use"""
+        cache.set(self.version_key, time_ns(), timeout=None)
+        self._cache.clear()
+
+    def all(self):
+        return self.get_snapshot().objects
+
+
+class IngredientIndex(ReferenceData):
+    """Ingredient catalogue with prefix, then substring name lookup."""
+
+    def build(self, version, objects=None):
+        snapshot = super().build(version, objects)
+        snapshot.names = [item[NAME].lower() for item in snapshot.data]
+        snapshot.keys = sorted(
+            (name, position) for position, name in enumerate(snapshot.names)
+        )
+        return snapshot
+
+    def search(self, value, snapshot=None):
+        """return serialized ingredients matching value in id order"""
+        snapshot = snapshot or self.get_snapshot()
+        value = value.lower()
+        positions = []
+        for name, position in snapshot.keys[
+                bisect_left(snapshot.keys, (value,)):]:
+            if not name.startswith(value):
+                break
+            positions.append(position)
+        if not positions:
+            positions = [
+                position for position, name in enumerate(snapshot.names)
+                if value in name
+            ]
+        return [snapshot.data[position] for position in sorted(positions)]
+
+
+tags_data = ReferenceData(
+    Tag, TagsSerializer, ttl=settings.REFERENCE_DATA_TTL
+)
+ingredient_index = IngredientIndex(
+    Ingredient, IngredientsSerializer, ttl=settings.REFERENCE_DATA_TTL
+)
@@ -0,0 +1,70 @@
+import json
+from hashlib import sha256
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from utils.db_router import primary_reads
+
+VERSION_KEY = 'recipes:version'
+
+
+def get_version():
+    return cache.get_or_set(VERSION_KEY, time_ns, timeout=None)
+
+
+async def aget_version():
+    return await cache.aget_or_set(VERSION_KEY, time_ns, timeout=None)
+
+
+def invalidate():
+    """drop every cached recipe response, in all workers sharing cache"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        pass
+
+
+def get_cache_key(view, request, version=None):
+    params = sorted(
+        (key, sorted(request.query_params.getlist(key)))
+        for key in request.query_params if key in view.cache_query_params
+    )
+    kwargs = {key: str(value) for key, value in view.kwargs.items()}
+    raw = json.dumps(
+        [request.get_host(), view.action, kwargs, params], sort_keys=True
+    )
+    if version is None:
+        version = get_version()
+    return f'recipes:{version}:{sha256(raw.encode()).hexdigest()}'
+
+
+def get_cached_response(view, handler, request, *args, **kwargs):
+    """return handler response, cached for anonymous users"""
+    if request.user.is_authenticated:
+        return handler(request, *args, **kwargs)
+    key = get_cache_key(view, request)
+    if (data := cache.get(key)) is not None:
+        return Response(data)
+    # a lagging replica would cache rows from before the last invalidate
+    with primary_reads():
+        response = handler(request, *args, **kwargs)
+    if response.status_code == 200:
+        cache.set(key, response.data, settings.RECIPES_CACHE_TIMEOUT)
+    return response
+
+
+async def aget_cached_response(view, handler, request, *args, **kwargs):
+    """get_cached_response for async views and handlers"""
+    if request.user.is_authenticated:
+        return await handler(request, *args, **kwargs)
+    key = get_cache_key(view, request, await aget_version())
+    if (data := await cache.aget(key)) is not None:
+        return Response(data)
+    with primary_reads():
+        response = await handler(request, *args, **kwargs)
+    if response.status_code == 200:
+        await cache.aset(key, response.data, settings.RECIPES_CACHE_TIMEOUT)
+    return response
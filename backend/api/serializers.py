@@ -1,28 +1,36 @@
-from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from djoser.serializers import UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
-from common.constants import (AMOUNT, AUTHOR, COOKING_TIME,
+from common.constants import (AMOUNT, AUTHOR, AVATAR, COOKING_TIME,
                               ERROR_DUBLE_INGREDIENT, ERROR_DUBLE_TAG,
                               ERROR_INGREDIENTS, ERROR_NONE_TAG,
                               ERROR_REQUIRED_FIELD, ERROR_TAGS, ID, IMAGE,
                               INGREDIENTS, IS_FAVORITED, IS_IN_SHOPPING_CART,
-                              MEASUREMENT_UNIT, NAME, REQUEST, SHORT_LINK,
-                              SLUG, TAGS, TEXT)
+                              IS_SUBSCRIBED, MEASUREMENT_UNIT, MEDIUM, NAME,
+                              RECIPES_LIMIT, RECIPES_PREVIEW, REQUEST,
+                              SHORT_LINK, SLUG, SMALL, TAGS, TEXT)
 from recipes.models import Ingredient, IngredientsRecipes, Recipe, Tag
-from users.models import Subscriber
-from utils.short_link_gen import get_link
+from recipes.search import update_on_commit
 
+from .fields import IdListField, ImageVariantField, UploadImageField
 from .mixins import GetUserMixin
 
 User = get_user_model()
 
 
+def get_recipes_limit(request):
+    """return recipes_limit query param as int or None"""
+    try:
+        limit = int(request.query_params[RECIPES_LIMIT])
+    except (KeyError, ValueError):
+        return None
+    return limit if limit > 0 else None
+
+
 class UserAvatarUpdateSerializer(serializers.ModelSerializer):
-    avatar = Base64ImageField()
+    avatar = UploadImageField()
 
     class Meta:
         model = User
@@ -31,6 +39,7 @@ class UserAvatarUpdateSerializer(serializers.ModelSerializer):
 
 class UserSerializer(GetUserMixin, UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar = ImageVariantField(SMALL, image_field=AVATAR)
 
     class Meta:
         model = User
@@ -45,13 +54,14 @@ class UserSerializer(GetUserMixin, UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        if not (user := self.get_user_object()):
+        if (is_subscribed := getattr(obj, IS_SUBSCRIBED, None)) is not None:
+            return is_subscribed
+        if not (user := self.get_user_object()) or user == obj:
             return False
-        return Subscriber.objects.filter(user=user, subscriber=obj).exists()
+        return obj.pk in self.get_subscribed_ids()
 
 
 class SubscribeSerializer(UserSerializer):
-    recipes_count = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
     is_subscribed = serializers.BooleanField(default=True)
 
@@ -69,16 +79,14 @@ class SubscribeSerializer(UserSerializer):
             'avatar'
         )
 
-    def get_recipes_count(self, obj):
-        return len(obj.recipes.all())
-
     def get_recipes(self, obj):
-        limit = self.context['request'].query_params.get('recipes_limit')
-        if limit and limit.isdigit():
-            queryset = obj.recipes.all()[:int(limit)]
-        else:
+        if (queryset := getattr(obj, RECIPES_PREVIEW, None)) is None:
             queryset = obj.recipes.all()
-        serializer = ShortRecipeSerializer(instance=queryset, many=True)
+            if limit := get_recipes_limit(self.context[REQUEST]):
+                queryset = queryset[:limit]
+        serializer = ShortRecipeSerializer(
+            instance=queryset, many=True, context=self.context
+        )
         return serializer.data
 
 
@@ -96,20 +104,6 @@ class IngredientsSerializer(serializers.ModelSerializer):
         fields = (ID, NAME, MEASUREMENT_UNIT)
 
 
-class IngredientsInRecipeSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        read_only=True, source='ingredient.id'
-    )
-    name = serializers.CharField(read_only=True, source='ingredient.name')
-    measurement_unit = serializers.CharField(
-        read_only=True, source='ingredient.measurement_unit'
-    )
-
-    class Meta:
-        model = IngredientsRecipes
-        fields = [ID, NAME, MEASUREMENT_UNIT, AMOUNT]
-
-
 class IngredientsInRecipeCreateSerializer(serializers.ModelSerializer):
     id = serializers.PrimaryKeyRelatedField(
         queryset=Ingredient.objects.all()
@@ -125,6 +119,7 @@ class RecipesReadSerializer(GetUserMixin, serializers.ModelSerializer):
     is_favorited = serializers.BooleanField(default=False)
     author = UserSerializer(many=False, read_only=True)
     ingredients = serializers.SerializerMethodField()
+    image = ImageVariantField(MEDIUM)
     tags = TagsSerializer(many=True)
 
     class Meta:
@@ -135,16 +130,19 @@ class RecipesReadSerializer(GetUserMixin, serializers.ModelSerializer):
         )
 
     def get_ingredients(self, obj):
-        ingredient_in_recipe = obj.recipe_ingredients.all()
-        data = [
-            IngredientsInRecipeSerializer(ingredient).data for ingredient
-            in ingredient_in_recipe
+        return [
+            {
+                ID: item.ingredient.id,
+                NAME: item.ingredient.name,
+                MEASUREMENT_UNIT: item.ingredient.measurement_unit,
+                AMOUNT: item.amount,
+            }
+            for item in obj.recipe_ingredients.all()
         ]
-        return data
 
 
 class RecipesWriteSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
+    image = UploadImageField()
     tags = serializers.PrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True,
@@ -196,10 +194,33 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
         ]
         IngredientsRecipes.objects.bulk_create(ingredient_recipe)
 
+    def update_ingredients(self, recipe, ingredients):
+        """write only the difference between current and new ingredients"""
+        amounts = {data[ID].id: data[AMOUNT] for data in ingredients}
+        changed, removed = [], []
+        for row in recipe.recipe_ingredients.all():
+            amount = amounts.pop(row.ingredient_id, None)
+            if amount is None:
+                removed.append(row.pk)
+            elif row.amount != amount:
+                row.amount = amount
+                changed.append(row)
+        if removed:
+            IngredientsRecipes.objects.filter(pk__in=removed).delete()
+        if changed:
+            IngredientsRecipes.objects.bulk_update(changed, [AMOUNT])
+        if amounts:
+            IngredientsRecipes.objects.bulk_create(
+                IngredientsRecipes(
+                    recipe=recipe, ingredient_id=pk, amount=amount
+                ) for pk, amount in amounts.items()
+            )
+            # bulk_create sends no signals, the vector misses the new names
+            update_on_commit([recipe.pk])
+
     @transaction.atomic
     def create(self, validated_data):
         validated_data[AUTHOR] = self.context[REQUEST].user
-        validated_data[SHORT_LINK] = get_link()
         ingredients = validated_data.pop(INGREDIENTS)
         tags = validated_data.pop(TAGS)
         recipe = Recipe.objects.create(**validated_data)
@@ -216,13 +237,25 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 ERROR_INGREDIENTS
             )
-        super().update(instance, validated_data)
-        instance.recipe_ingredients.all().delete()
-        self.create_update_ingredients_tags(instance, tags, ingredients)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        # only the edited fields, counters may have moved since the read
+        instance.save(update_fields=list(validated_data))
+        instance.tags.set(tags)
+        self.update_ingredients(instance, ingredients)
         return instance
 
     def to_representation(self, instance):
-        return RecipesReadSerializer(instance).data
+        instance = Recipe.with_related.get(pk=instance.pk)
+        return RecipesReadSerializer(instance, context=self.context).data
+
+
+class RecipesBatchSerializer(serializers.Serializer):
+    recipes = IdListField()
+
+
+class UsersBatchSerializer(serializers.Serializer):
+    users = IdListField()
 
 
 class ShortLinkSerializer(serializers.ModelSerializer):
@@ -233,13 +266,8 @@ class ShortLinkSerializer(serializers.ModelSerializer):
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
-    image = serializers.SerializerMethodField()
+    image = ImageVariantField(SMALL)
 
     class Meta:
         model = Recipe
         fields = [ID, NAME, IMAGE, COOKING_TIME]
-
-    def get_image(self, obj):
-        if obj.image:
-            return f'{settings.UBSOLUTE_DOMAIN}/media/{str(obj.image)}'
-        return None
@@ -1,19 +1,42 @@
-from common.constants import RECIPE, USER
+import json
+from hashlib import sha256
+
+from django.conf import settings
+from django.db.models import Sum
+
+from common.constants import AMOUNT, INGREDIENT, MEASUREMENT_UNIT, NAME
+from recipes.models import IngredientsRecipes
+from utils.cache import LRUCache
 from utils.pdf_gen import get_pdf
 
+INGREDIENT_NAME = f'{INGREDIENT}__{NAME}'
+INGREDIENT_MEASUREMENT_UNIT = f'{INGREDIENT}__{MEASUREMENT_UNIT}'
+
+# Documents are keyed by the hash of the aggregated cart, so any change of
+# ShoppingCart or IngredientsRecipes rows yields a new key in every worker.
+shopping_list_cache = LRUCache(
+    maxsize=settings.SHOPPING_LIST_CACHE_SIZE,
+    ttl=settings.SHOPPING_LIST_CACHE_TTL
+)
+
+
+def get_shopping_cart_ingredients(user):
+    """return [(name, measurement_unit, total amount), ...] for user cart"""
+    return list(
+        IngredientsRecipes.objects
+        .filter(recipe__shopping_cart__user=user)
+        .values_list(INGREDIENT_NAME, INGREDIENT_MEASUREMENT_UNIT)
+        .annotate(total=Sum(AMOUNT))
+        .order_by(INGREDIENT_NAME, INGREDIENT_MEASUREMENT_UNIT)
+    )
+
+
+def get_cart_hash(data):
+    return sha256(json.dumps(data, ensure_ascii=False).encode()).hexdigest()
+
 
 def get_shopping_list(user):
-    data = {}
-    shopping_cart = user.shopping_cart.prefetch_related(
-        USER, RECIPE
+    data = get_shopping_cart_ingredients(user)
+    return shopping_list_cache.get_or_set(
+        get_cart_hash(data), lambda: get_pdf(data)
     )
-    ingredients_in_recipes = [
-        i.recipe.recipe_ingredients.all() for i in shopping_cart
-    ]
-    for ingredients in ingredients_in_recipes:
-        for ingredient in ingredients:
-            if ingredient.ingredient not in data:
-                data[ingredient.ingredient] = 0
-            data[ingredient.ingredient] += ingredient.amount
-    file = get_pdf(data)
-    return file
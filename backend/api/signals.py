@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (Ingredient, IngredientsRecipes, Recipe, Tag,
+                            TagsRecipes)
+
+from . import response_cache
+from .authentication import evict_users
+from .reference_data import ingredient_index, tags_data
+
+User = get_user_model()
+# author fields rendered inside recipe responses
+AUTHOR_FIELDS = frozenset((
+    'email', 'username', 'first_name', 'last_name', 'avatar', 'avatar_variants'
+))
+AUTHOR_CHANGED = '_author_changed'
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    transaction.on_commit(ingredient_index.invalidate)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags_data(**kwargs):
+    transaction.on_commit(tags_data.invalidate)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=IngredientsRecipes)
+@receiver((post_save, post_delete), sender=TagsRecipes)
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipes_cache(**kwargs):
+    transaction.on_commit(response_cache.invalidate)
+
+
+def get_author_values(user):
+    return {
+        name: User._meta.get_field(name).value_to_string(user)
+        for name in AUTHOR_FIELDS
+    }
+
+
+@receiver(pre_save, sender=User)
+def detect_author_change(instance, update_fields=None, **kwargs):
+    """signups, logins and password changes keep cached recipes"""
+    if instance._state.adding:
+        changed = False
+    elif update_fields is not None:
+        changed = not AUTHOR_FIELDS.isdisjoint(update_fields)
+    else:
+        old = User.objects.filter(pk=instance.pk).only(*AUTHOR_FIELDS).first()
+        changed = old is None or (
+            get_author_values(old) != get_author_values(instance)
+        )
+    setattr(instance, AUTHOR_CHANGED, changed)
+
+
+@receiver(post_save, sender=User)
+def invalidate_recipes_cache_on_author_change(instance, **kwargs):
+    if instance.__dict__.pop(AUTHOR_CHANGED, False):
+        transaction.on_commit(response_cache.invalidate)
+
+
+@receiver((post_save, post_delete), sender=User)
+def evict_authenticated_user(instance, **kwargs):
+    """password change, deactivation and any other user update"""
+    user_ids = [instance.pk]
+    transaction.on_commit(lambda: evict_users(user_ids))
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(instance, **kwargs):
+    """logout and admin token removal"""
+    user_ids = [instance.user_id]
+    transaction.on_commit(lambda: evict_users(user_ids))
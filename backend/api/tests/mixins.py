@@ -0,0 +1,26 @@
+import tempfile
+
+from django.test import override_settings
+
+from api.benchmark import SkipTasks, seed
+from utils import images
+
+
+class BenchmarkDataMixin:
+    """seed the benchmark data with image variants and replicas off"""
+
+    seed_options = {'users': 30, 'recipes': 60, 'ingredients': 50}
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root.name, DB_REPLICAS=[],
+            PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(setattr, images, 'executor', images.executor)
+        images.executor = SkipTasks()
+        self.context = seed(**self.seed_options)
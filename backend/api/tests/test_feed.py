@@ -0,0 +1,55 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from api.benchmark import SkipTasks
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscriber
+from utils import images
+
+User = get_user_model()
+
+
+@override_settings(FEED_FANOUT_THRESHOLD=1, FEED_SIZE=2)
+class FeedSizeTest(TestCase):
+    """precomputed feeds keep only the FEED_SIZE newest recipes"""
+
+    def setUp(self):
+        self.addCleanup(setattr, images, 'executor', images.executor)
+        images.executor = SkipTasks()
+        self.user, *self.authors = User.objects.bulk_create(
+            User(email=f'user{i}@example.com', username=f'user{i}')
+            for i in range(3)
+        )
+
+    def follow(self):
+        for author in self.authors:
+            Subscriber.objects.create(user=self.user, subscriber=author)
+
+    def add_recipes(self, count):
+        return [
+            Recipe.objects.create(
+                author=self.authors[i % 2], name=f'Рецепт {i}', text='Текст',
+                cooking_time=10, image='recipes/images/recipe.png'
+            ).pk
+            for i in range(count)
+        ]
+
+    def get_feed(self):
+        return list(FeedEntry.objects.filter(user=self.user).order_by(
+            '-recipe_id'
+        ).values_list('recipe_id', flat=True))
+
+    def test_fan_out_keeps_newest(self):
+        self.follow()
+        recipe_ids = self.add_recipes(4)
+        self.assertEqual(self.get_feed(), recipe_ids[:-3:-1])
+
+    def test_backfill_command(self):
+        recipe_ids = self.add_recipes(3)
+        self.follow()
+        FeedEntry.objects.all().delete()
+        call_command('backfill_feeds', stdout=StringIO())
+        self.assertEqual(self.get_feed(), recipe_ids[:-3:-1])
@@ -0,0 +1,61 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from utils.images import SOURCE, get_pending
+
+from .mixins import BenchmarkDataMixin
+
+User = get_user_model()
+
+
+class ImageVariantsTest(BenchmarkDataMixin, TransactionTestCase):
+    """renders lost with the executor are found and made by the command"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.context["token"]}'
+        )
+
+    def make_variants(self):
+        call_command('make_image_variants', stdout=StringIO())
+
+    def test_lost_renders_are_retried(self):
+        response = self.client.put(
+            '/api/users/me/avatar/', {'avatar': self.context['image']},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        user = User.objects.get(pk=self.context['main_user'].pk)
+        self.assertEqual(
+            response.data['avatar'],
+            f'http://testserver{user.avatar.url}'
+        )
+        self.assertQuerySetEqual(
+            get_pending(User, 'avatar', 'avatar_variants'), [user]
+        )
+        self.assertTrue(get_pending(Recipe, 'image', 'image_variants'))
+        self.make_variants()
+        self.assertFalse(get_pending(User, 'avatar', 'avatar_variants'))
+        self.assertFalse(get_pending(Recipe, 'image', 'image_variants'))
+        user.refresh_from_db()
+        self.assertEqual(user.avatar_variants[SOURCE], user.avatar.name)
+
+    def test_subscription_recipes_use_variants(self):
+        self.make_variants()
+        response = self.client.get('/api/users/subscriptions/?image=webp')
+        self.assertEqual(response.status_code, 200)
+        images = [
+            recipe['image']
+            for author in response.data['results']
+            for recipe in author['recipes']
+        ]
+        self.assertTrue(images)
+        for image in images:
+            self.assertTrue(image.endswith('.webp'), image)
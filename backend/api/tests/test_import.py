@@ -0,0 +1,42 @@
+import json
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from api.reference_data import ingredient_index, tags_data
+
+
+class ImportCachesTest(TransactionTestCase):
+    """import_json drops the snapshots its bulk inserts make stale"""
+
+    def write(self, directory, name, items):
+        path = Path(directory) / name
+        path.write_text('\n'.join(json.dumps(item) for item in items))
+        return str(path)
+
+    def test_import_invalidates_snapshots(self):
+        cache.clear()
+        self.assertEqual(ingredient_index.get_snapshot().data, [])
+        self.assertEqual(tags_data.get_snapshot().data, [])
+        with TemporaryDirectory() as directory:
+            call_command(
+                'import_json', stdout=StringIO(),
+                ingredients=self.write(directory, 'ingredients.ndjson', [
+                    {'name': 'соль', 'measurement_unit': 'г'}
+                ]),
+                tags=self.write(directory, 'tags.ndjson', [
+                    {'name': 'Ужин', 'slug': 'dinner'}
+                ])
+            )
+        self.assertEqual(
+            [item['name'] for item in ingredient_index.search('со')],
+            ['соль']
+        )
+        self.assertEqual(
+            [item['slug'] for item in tags_data.get_snapshot().data],
+            ['dinner']
+        )
@@ -0,0 +1,26 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from api.benchmark import ENDPOINTS, get_missing_indexes
+
+from .mixins import BenchmarkDataMixin
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN needs PostgreSQL')
+class IndexUseTest(BenchmarkDataMixin, TransactionTestCase):
+    """filters and feeds read through their indexes on the benchmark data"""
+
+    seed_options = {}
+
+    def test_endpoint_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        for endpoint in ENDPOINTS:
+            if not endpoint.indexes:
+                continue
+            with self.subTest(f'{endpoint.method.upper()} {endpoint.path}'):
+                self.assertEqual(
+                    get_missing_indexes(endpoint, self.context), []
+                )
@@ -0,0 +1,30 @@
+from django.test import SimpleTestCase, TransactionTestCase
+
+from api.benchmark import (ENDPOINTS, USER_TYPES, call, get_budget,
+                           get_uncovered_routes)
+
+from .mixins import BenchmarkDataMixin
+
+
+class RoutesTest(SimpleTestCase):
+    def test_every_route_has_endpoint(self):
+        self.assertEqual(get_uncovered_routes(), [])
+
+
+class EndpointQueriesTest(BenchmarkDataMixin, TransactionTestCase):
+    """
+    Every endpoint runs its budgeted number of queries.
+
+    TransactionTestCase commits, so on_commit work such as search
+    vector updates and feed fan-out is counted like in production.
+    """
+
+    def test_endpoint_queries(self):
+        for endpoint in ENDPOINTS:
+            for user_type in USER_TYPES:
+                name = f'{endpoint.method.upper()} {endpoint.path} {user_type}'
+                with self.subTest(name):
+                    with self.assertNumQueries(
+                            get_budget(endpoint, user_type)):
+                        status, _, _ = call(endpoint, self.context, user_type)
+                    self.assertLess(status, 500)
@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.benchmark import clear_caches
+from recipes.models import (FavoriteRecipes, Ingredient, IngredientsRecipes,
+                            Recipe, ShoppingCart, Tag, TagsRecipes)
+
+User = get_user_model()
+
+
+class RecipeQueriesTest(TestCase):
+    """recipe pages run the same queries however many rows they show"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user', password='password',
+            first_name='Имя', last_name='Фамилия'
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', slug=f'tag{i}') for i in range(3)
+        )
+
+    def setUp(self):
+        self.anonymous = APIClient()
+        self.authenticated = APIClient()
+        self.authenticated.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+
+    def add_recipes(self, count, ingredients):
+        """count recipes by new authors with new ingredients each"""
+        start = Recipe.objects.count()
+        authors = User.objects.bulk_create(
+            User(email=f'author{start + i}@example.com',
+                 username=f'author{start + i}')
+            for i in range(count)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                name=f'Рецепт {start + i}', text='Описание',
+                cooking_time=10, image='recipes/images/recipe.png',
+                author=author
+            ) for i, author in enumerate(authors)
+        )
+        for recipe in recipes:
+            IngredientsRecipes.objects.bulk_create(
+                IngredientsRecipes(recipe=recipe, ingredient=ingredient,
+                                   amount=5)
+                for ingredient in Ingredient.objects.bulk_create(
+                    Ingredient(name=f'ингредиент {recipe.pk}-{i}',
+                               measurement_unit='г')
+                    for i in range(ingredients)
+                )
+            )
+            TagsRecipes.objects.bulk_create(
+                TagsRecipes(recipe=recipe, tag=tag) for tag in self.tags
+            )
+            FavoriteRecipes.objects.create(user=self.user, recipe=recipe)
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+
+    def count_queries(self, client, path):
+        clear_caches()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def add_ingredients(self, recipe, count):
+        IngredientsRecipes.objects.bulk_create(
+            IngredientsRecipes(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in Ingredient.objects.bulk_create(
+                Ingredient(name=f'добавка {recipe.pk}-{i}',
+                           measurement_unit='г')
+                for i in range(count)
+            )
+        )
+
+    def assertSameQueries(self, paths, grow):
+        """paths run as many queries after grow() as before"""
+        clients = (self.anonymous, self.authenticated)
+        counts = {
+            (client, path): self.count_queries(client, path)
+            for client in clients for path in paths
+        }
+        grow()
+        for (client, path), count in counts.items():
+            with self.subTest(path=path, authenticated=client is clients[1]):
+                clear_caches()
+                with self.assertNumQueries(count):
+                    client.get(path)
+
+    def test_list_queries(self):
+        self.add_recipes(2, ingredients=1)
+        self.assertSameQueries((
+            '/api/recipes/?limit=20',
+            '/api/recipes/?limit=20&tags=tag0',
+            '/api/recipes/?limit=20&is_favorited=1&is_in_shopping_cart=1',
+        ), grow=lambda: self.add_recipes(20, ingredients=15))
+
+    def test_detail_queries(self):
+        self.add_recipes(1, ingredients=1)
+        recipe = Recipe.objects.get()
+        self.assertSameQueries(
+            (f'/api/recipes/{recipe.pk}/',),
+            grow=lambda: self.add_ingredients(recipe, 30)
+        )
@@ -0,0 +1,46 @@
+from time import time_ns
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.reference_data import SNAPSHOT, ReferenceData
+from api.serializers import TagsSerializer
+from recipes.models import Tag
+
+
+class ReferenceDataTest(TestCase):
+    """snapshots follow the version shared through the Django cache"""
+
+    def setUp(self):
+        cache.clear()
+        Tag.objects.create(name='Завтрак', slug='breakfast')
+        self.tags = ReferenceData(Tag, TagsSerializer, ttl=None)
+        self.other = ReferenceData(Tag, TagsSerializer, ttl=None)
+
+    def test_rebuild_keeps_last_modified(self):
+        snapshot = self.tags.get_snapshot()
+        self.tags._cache.clear()
+        with self.assertNumQueries(1):
+            rebuilt = self.tags.get_snapshot()
+        self.assertEqual(rebuilt.last_modified, snapshot.last_modified)
+        self.assertEqual(rebuilt.etag, snapshot.etag)
+        self.assertEqual(
+            self.other.get_snapshot().last_modified, snapshot.last_modified
+        )
+
+    def test_invalidate_reaches_other_instances(self):
+        snapshot = self.other.get_snapshot()
+        Tag.objects.create(name='Обед', slug='lunch')
+        with self.assertNumQueries(0):
+            self.assertIs(self.other.get_snapshot(), snapshot)
+        self.tags.invalidate()
+        rebuilt = self.other.get_snapshot()
+        self.assertEqual(len(rebuilt.data), 2)
+        self.assertGreater(rebuilt.last_modified, snapshot.last_modified)
+
+    def test_version_changed_during_build(self):
+        version = self.tags.get_version()
+        snapshot = self.tags.build(version)
+        self.tags._cache.set(SNAPSHOT, snapshot)
+        cache.set(self.tags.version_key, time_ns(), timeout=None)
+        self.assertIsNot(self.tags.get_snapshot(), snapshot)
@@ -0,0 +1,104 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.benchmark import SkipTasks
+from recipes.models import Ingredient, IngredientsRecipes, Recipe, Tag
+from utils import images
+
+User = get_user_model()
+
+
+class SearchTestMixin:
+
+    def setUp(self):
+        super().setUp()
+        # the recipe image is not a file, skip rendering its variants
+        self.addCleanup(setattr, images, 'executor', images.executor)
+        images.executor = SkipTasks()
+        self.user = User.objects.create_user(
+            email='user@example.com', username='user', password='password',
+            first_name='Имя', last_name='Фамилия'
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}'
+        )
+        self.tag = Tag.objects.create(name='Обед', slug='lunch')
+        self.salt, self.saffron = Ingredient.objects.bulk_create((
+            Ingredient(name='соль', measurement_unit='г'),
+            Ingredient(name='шафран', measurement_unit='г'),
+        ))
+        self.recipe = Recipe.objects.create(
+            author=self.user, name='Плов', text='Рис с морковью',
+            cooking_time=60, image='recipes/images/recipe.png'
+        )
+        IngredientsRecipes.objects.create(
+            recipe=self.recipe, ingredient=self.salt, amount=5
+        )
+
+    def search(self, value):
+        response = self.client.get('/api/recipes/', {'search': value})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+
+class SearchCursorTest(SearchTestMixin, TestCase):
+    """keyset pagination keeps the id order, search ranks need pages"""
+
+    def test_cursor_with_search(self):
+        response = self.client.get(
+            '/api/recipes/', {'cursor': '', 'search': 'плов'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.data)
+
+    def test_cursor_with_empty_search(self):
+        response = self.client.get(
+            '/api/recipes/', {'cursor': '', 'search': ' '}
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'search needs PostgreSQL')
+class SearchVectorTest(SearchTestMixin, TransactionTestCase):
+    """vectors follow ingredient rows however they are written"""
+
+    def test_recipe_ingredient_rows(self):
+        self.assertEqual(self.search('соль'), [self.recipe.pk])
+        row = IngredientsRecipes.objects.create(
+            recipe=self.recipe, ingredient=self.saffron, amount=1
+        )
+        self.assertEqual(self.search('шафран'), [self.recipe.pk])
+        row.delete()
+        self.assertEqual(self.search('шафран'), [])
+
+    def test_ingredient_rename(self):
+        self.salt.name = 'морская соль'
+        self.salt.save()
+        self.assertEqual(self.search('морская'), [self.recipe.pk])
+
+    def test_update_adding_ingredients(self):
+        response = self.client.patch(
+            f'/api/recipes/{self.recipe.pk}/', {
+                'tags': [self.tag.pk], 'cooking_time': 50,
+                'ingredients': [
+                    {'id': self.salt.pk, 'amount': 5},
+                    {'id': self.saffron.pk, 'amount': 1},
+                ],
+            }, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search('шафран'), [self.recipe.pk])
+
+    def test_delete_recipe(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.recipe.delete()
+        self.assertFalse([
+            query for query in queries if 'search_vector' in query['sql']
+        ])
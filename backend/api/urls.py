@@ -2,20 +2,33 @@ from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter, SimpleRouter
 
-from .views import IngredientsView, RecipeViewSet, TagsView, UserViewSet
+from .async_views import (AsyncIngredientsView, AsyncRecipeViewSet,
+                          AsyncTagsView)
+from .views import (DatabaseStatsView, IngredientsView, RecipeViewSet,
+                    TagsView, UserViewSet)
 
 app_name = 'api_v1'
 
 Router = DefaultRouter if settings.DEBUG else SimpleRouter
 
+if settings.ASYNC_VIEWS:
+    tags_view, ingredients_view, recipes_view = (
+        AsyncTagsView, AsyncIngredientsView, AsyncRecipeViewSet
+    )
+else:
+    tags_view, ingredients_view, recipes_view = (
+        TagsView, IngredientsView, RecipeViewSet
+    )
+
 router_v1 = Router()
 router_v1.register(r'users', UserViewSet, basename='users')
-router_v1.register(r'tags', TagsView, basename='tags')
-router_v1.register(r'ingredients', IngredientsView, basename='ingredients')
-router_v1.register(r'recipes', RecipeViewSet, basename='recipes')
+router_v1.register(r'tags', tags_view, basename='tags')
+router_v1.register(r'ingredients', ingredients_view, basename='ingredients')
+router_v1.register(r'recipes', recipes_view, basename='recipes')
 
 
 urlpatterns = [
     path('', include(router_v1.urls), name='routers'),
     path('auth/', include('djoser.urls.authtoken'), name='auth'),
+    path('stats/db/', DatabaseStatsView.as_view(), name='db_stats'),
 ]
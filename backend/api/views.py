@@ -1,8 +1,9 @@
-import os
+from io import BytesIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Exists, OuterRef
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
 from django.http import FileResponse
 from django.shortcuts import get_object_or_404, redirect
 from django_filters import rest_framework as filters
@@ -10,33 +11,72 @@ from djoser.views import UserViewSet
 from rest_condition import Or
 from rest_framework import status, views, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.permissions import (SAFE_METHODS, IsAdminUser,
+                                        IsAuthenticated)
 from rest_framework.response import Response
 
-from common.constants import (AVATAR, ERROR_RECIPE_FAVORITE_DOES_NOT_EXISTS,
+from common.constants import (AUTHOR, AVATAR, COOKING_TIME, CREATED,
+                              ERROR_RECIPE_FAVORITE_DOES_NOT_EXISTS,
                               ERROR_RECIPE_SHOPPING_CART_DOES_NOT_EXISTS,
                               ERROR_SUBSCRIBER_DOES_NOT_EXISTS,
                               ERROR_SUBSCRIBER_IS_ALREADY,
-                              ERROR_SUBSCRIBER_USER_USER, ID, SUBSCRIBER,
-                              SUBSCRIPTIONS, USER)
+                              ERROR_SUBSCRIBER_USER_USER, ID, IMAGE,
+                              IMAGE_VARIANTS, NAME, RECIPE, RECIPES,
+                              RECIPES_PREVIEW, SEARCH, STATUS, SUBSCRIBER,
+                              SUBSCRIPTIONS, TAGS, USERS)
+from recipes.feed import follow, get_feed_queryset
 from recipes.models import (FavoriteRecipes, Ingredient, Recipe, ShoppingCart,
                             Tag)
 from users.models import Subscriber
+from utils.db_stats import get_all_pool_stats
+from utils.pdf_gen import FILE_NAME
+from utils.short_link_gen import get_link, get_recipe_id
 
-from .filters import IngredienFilterSet, RecipeFilterSet
-from .mixins import ListRetriveMixin
+from .batch import add_rows
+from .filters import RecipeFilterSet
+from .mixins import AnonymousCacheMixin, ReferenceDataMixin
 from .pagination import RecipesPagination
 from .permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
-from .serializers import (IngredientsSerializer, RecipesReadSerializer,
-                          RecipesWriteSerializer, ShortRecipeSerializer,
-                          SubscribeSerializer, TagsSerializer,
-                          UserAvatarUpdateSerializer)
-from .shopping_cart import get_shopping_list
+from .reference_data import ingredient_index, tags_data
+from .serializers import (IngredientsSerializer, RecipesBatchSerializer,
+                          RecipesReadSerializer, RecipesWriteSerializer,
+                          ShortRecipeSerializer, SubscribeSerializer,
+                          TagsSerializer, UserAvatarUpdateSerializer,
+                          UsersBatchSerializer, get_recipes_limit)
+from .shopping_cart import get_shopping_list, shopping_list_cache
 
 User = get_user_model()
 
 
 class UserViewSet(UserViewSet):
+    def get_queryset(self):
+        user = self.request.user
+        queryset = super().get_queryset()
+        if not user.is_authenticated:
+            return queryset
+        return queryset.annotate(is_subscribed=Exists(
+            Subscriber.objects.filter(user=user, subscriber=OuterRef('pk'))
+        ))
+
+    def reload_user(self):
+        """
+        Replace request.user with the current row before saving it.
+
+        The authenticated copy may predate counter updates, saving it
+        would write the old counters back.
+        """
+        self.request.user = User.objects.get(pk=self.request.user.pk)
+
+    @action(['post'], detail=False)
+    def set_password(self, request, *args, **kwargs):
+        self.reload_user()
+        return super().set_password(request, *args, **kwargs)
+
+    @action(['post'], detail=False, url_path=f'set_{User.USERNAME_FIELD}')
+    def set_username(self, request, *args, **kwargs):
+        self.reload_user()
+        return super().set_username(request, *args, **kwargs)
+
     @action(
         ['put'], detail=False, url_path='me/avatar',
         permission_classes=[IsAuthenticated]
@@ -45,20 +85,24 @@ class UserViewSet(UserViewSet):
         serializer = UserAvatarUpdateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         avatar_data = serializer.validated_data.get(AVATAR)
+        self.reload_user()
         request.user.avatar = avatar_data
-        request.user.save()
-        image_url = request.build_absolute_uri(
-            f'/media/users/{avatar_data.name}'
-        )
+        request.user.save(update_fields=[AVATAR])
+        image_url = request.build_absolute_uri(request.user.avatar.url)
         return Response({AVATAR: image_url}, status=status.HTTP_200_OK)
 
     @change_avatar.mapping.delete
     def delete_avatar(self, request, *args, **kwargs):
-        request.user.avatar.delete()
+        self.reload_user()
+        request.user.avatar.delete(save=False)
+        request.user.save(update_fields=[AVATAR])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(['get'], detail=False, permission_classes=[IsAuthenticated])
     def me(self, request, *args, **kwargs):
+        if request.user.get_deferred_fields():
+            # cached authentication loads only the permission fields
+            self.reload_user()
         self.get_object = self.get_instance
         return self.retrieve(request, *args, **kwargs)
 
@@ -71,14 +115,19 @@ class UserViewSet(UserViewSet):
         serializer_class=[SubscribeSerializer],
     )
     def subscriptions(self, request, *args, **kwargs):
-        all_sub = request.user.users_ubscribers.select_related(
-            USER, SUBSCRIBER
-        )
-        page = self.paginate_queryset(all_sub)
-        data = [
-            SubscribeSerializer(
-                subscriber_obj.subscriber, context={'request': request}).data
-            for subscriber_obj in page]
+        recipes = Recipe.objects.only(
+            ID, NAME, IMAGE, IMAGE_VARIANTS, COOKING_TIME, AUTHOR
+        )
+        if limit := get_recipes_limit(request):
+            recipes = recipes[:limit]
+        authors = User.objects.filter(
+            subscribers__user=request.user
+        ).prefetch_related(
+            Prefetch(RECIPES, queryset=recipes, to_attr=RECIPES_PREVIEW)
+        ).order_by('subscribers__id')
+        page = self.paginate_queryset(authors)
+        data = SubscribeSerializer(
+            page, many=True, context={'request': request}).data
         return self.get_paginated_response(data)
 
     @action(
@@ -86,6 +135,7 @@ class UserViewSet(UserViewSet):
         permission_classes=[IsAuthenticated],
         serializer_class=[SubscribeSerializer],
     )
+    @transaction.atomic
     def subscribe(self, request, *args, **kwargs):
         subscribe_user = self.get_subscriber_user(**kwargs)
         if request.user == subscribe_user:
@@ -105,6 +155,7 @@ class UserViewSet(UserViewSet):
         return Response(data, status=status.HTTP_201_CREATED)
 
     @subscribe.mapping.delete
+    @transaction.atomic
     def del_subscribe(self, request, *args, **kwargs):
         subscribe_user = self.get_subscriber_user(**kwargs)
         subscribe = request.user.users_ubscribers.filter(
@@ -119,25 +170,52 @@ class UserViewSet(UserViewSet):
         subscribe.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        ['post'], detail=False, url_path='subscribe',
+        permission_classes=[IsAuthenticated],
+    )
+    def subscribe_batch(self, request, *args, **kwargs):
+        serializer = UsersBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = add_rows(
+            request.user, Subscriber, SUBSCRIBER, User,
+            serializer.validated_data[USERS]
+        )
+        follow(request.user.pk, [
+            result[ID] for result in results if result[STATUS] == CREATED
+        ])
+        return Response(results, status=status.HTTP_200_OK)
+
 
-class TagsView(ListRetriveMixin):
+class TagsView(ReferenceDataMixin):
     queryset = Tag.objects.all()
     serializer_class = TagsSerializer
+    reference_data = tags_data
 
 
-class IngredientsView(ListRetriveMixin):
+class IngredientsView(ReferenceDataMixin):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientsSerializer
-    filter_backends = [filters.DjangoFilterBackend]
-    filterset_class = IngredienFilterSet
+    reference_data = ingredient_index
+
+    def get_reference_list(self, snapshot):
+        if name := self.request.query_params.get(NAME):
+            return self.reference_data.search(name, snapshot)
+        return snapshot.data
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(AnonymousCacheMixin, viewsets.ModelViewSet):
     queryset = Recipe.with_related.all()
     filter_backends = [filters.DjangoFilterBackend]
     permission_classes = [Or(IsAuthorOrReadOnly, IsAdminOrReadOnly)]
     filterset_class = RecipeFilterSet
     pagination_class = RecipesPagination
+    cache_query_params = (
+        RecipesPagination.page_query_param,
+        RecipesPagination.page_size_query_param,
+        RecipesPagination.cursor_query_param,
+        AUTHOR, TAGS, IMAGE, SEARCH,
+    )
 
     def get_queryset(self):
         user = self.request.user
@@ -162,22 +240,43 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(['get'], detail=True, url_path='get-link',)
     def get_link(self, request, *args, **kwargs):
         recipe = self.get_recipe(kwargs)
-        short_link = request.build_absolute_uri(f'/s/{recipe.short_link}')
+        short_link = request.build_absolute_uri(f'/s/{get_link(recipe.pk)}')
         return Response({'short-link': short_link}, status=status.HTTP_200_OK)
 
+    @action(['get'], detail=False, permission_classes=[IsAuthenticated])
+    def feed(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(
+            get_feed_queryset(self.get_queryset(), request.user)
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = RecipesReadSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
     @action(
         ['get'], detail=False, url_path='download_shopping_cart',
         permission_classes=[IsAuthenticated]
     )
     def download_shopping_cart(self, request, *args, **kwargs):
-        file = get_shopping_list(request.user)
-        response = FileResponse(open(file, 'rb'))
-        os.remove(file)
-        return response
+        return FileResponse(
+            BytesIO(get_shopping_list(request.user)),
+            filename=FILE_NAME, content_type='application/pdf'
+        )
+
+    @action(
+        ['get'], detail=False, url_path='download_shopping_cart/stats',
+        permission_classes=[IsAdminUser]
+    )
+    def shopping_cart_cache_stats(self, request, *args, **kwargs):
+        return Response(
+            shopping_list_cache.stats(), status=status.HTTP_200_OK
+        )
 
     def get_recipe(self, kwargs):
         return get_object_or_404(Recipe, pk=kwargs['pk'])
 
+    @transaction.atomic
     def add_favorite_or_shoping_cart(self, request, model, *args, **kwargs):
         recipe = self.get_recipe(kwargs)
         shoping_add, created = model.objects.get_or_create(
@@ -193,6 +292,16 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.data, status=status.HTTP_201_CREATED
         )
 
+    def add_favorite_or_shoping_cart_batch(self, request, model):
+        serializer = RecipesBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = add_rows(
+            request.user, model, RECIPE, Recipe,
+            serializer.validated_data[RECIPES]
+        )
+        return Response(results, status=status.HTTP_200_OK)
+
+    @transaction.atomic
     def del_favorite_or_shoping_cart(self, request, model, *args, **kwargs):
         recipe = self.get_recipe(kwargs)
         obj = model.objects.filter(user=request.user, recipe=recipe)
@@ -219,6 +328,13 @@ class RecipeViewSet(viewsets.ModelViewSet):
             request, ShoppingCart, *args, **kwargs
         )
 
+    @action(
+        ['post'], detail=False, url_path='shopping_cart',
+        permission_classes=[IsAuthenticated]
+    )
+    def add_shoping_cart_batch(self, request, *args, **kwargs):
+        return self.add_favorite_or_shoping_cart_batch(request, ShoppingCart)
+
     @action(
         ['post'], detail=True, url_path='favorite',
         permission_classes=[IsAuthenticated],
@@ -234,9 +350,29 @@ class RecipeViewSet(viewsets.ModelViewSet):
             request, FavoriteRecipes, *args, **kwargs
         )
 
+    @action(
+        ['post'], detail=False, url_path='favorite',
+        permission_classes=[IsAuthenticated],
+    )
+    def add_favorite_batch(self, request, *args, **kwargs):
+        return self.add_favorite_or_shoping_cart_batch(
+            request, FavoriteRecipes
+        )
+
 
 class ShortLinkRedirectRecipeView(views.APIView):
     def get(self, request, *args, **kwargs):
-        recipe = get_object_or_404(Recipe, short_link=kwargs['slug'])
+        link = kwargs['slug']
+        if (recipe_id := get_recipe_id(link)) is not None:
+            recipe = get_object_or_404(Recipe, pk=recipe_id)
+        else:
+            recipe = get_object_or_404(Recipe, short_link=link)
         url = f'{settings.UBSOLUTE_DOMAIN}/recipes/{recipe.id}/'
         return redirect(url)
+
+
+class DatabaseStatsView(views.APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_all_pool_stats(), status=status.HTTP_200_OK)
@@ -10,6 +10,8 @@ MAX_128 = 128
 ID = 'id'
 TAGS = 'tags'
 AUTHOR = 'author'
+SEARCH = 'search'
+SEARCH_CONFIG = 'russian'
 INGREDIENT = 'ingredient'
 INGREDIENTS = 'ingredients'
 IS_FAVORITED = 'is_favorited'
@@ -19,6 +21,12 @@ IMAGE = 'image'
 TEXT = 'text'
 COOKING_TIME = 'cooking_time'
 SHORT_LINK = 'short_link'
+IMAGE_VARIANTS = 'image_variants'
+SMALL = 'small'
+MEDIUM = 'medium'
+ORIGINAL = 'original'
+JPG = 'jpg'
+WEBP = 'webp'
 ERROR_INGREDIENTS = 'Обязательное поле.'
 ERROR_TAGS = 'Обязательное поле.'
 ERROR_REQUIRED_FIELD = 'Обязательное поле.'
@@ -43,12 +51,26 @@ MEASUREMENT_UNIT = 'measurement_unit'
 
 # User
 AVATAR = 'avatar'
+AVATAR_VARIANTS = 'avatar_variants'
 SUBSCRIBER = 'subscriber'
 USER = 'user'
 SUBSCRIPTIONS = 'subscriptions'
 SUBSCRIBE = 'subscribe'
+IS_SUBSCRIBED = 'is_subscribed'
+RECIPES_LIMIT = 'recipes_limit'
+RECIPES_PREVIEW = 'recipes_preview'
+SUBSCRIBED_IDS = '_subscribed_ids'
 ERROR_SUBSCRIBER_USER_USER = {'error': 'Нельзя подписаться на себя.'}
 ERROR_SUBSCRIBER_IS_ALREADY = {
     'error': 'Вы уже подписаны на этого пользователя.'}
 ERROR_SUBSCRIBER_DOES_NOT_EXISTS = {
     'error': 'Подписка на пользователя не найдена.'}
+USERS = 'users'
+
+# Batch
+BATCH_MAX_SIZE = 100
+STATUS = 'status'
+CREATED = 'created'
+EXISTS = 'exists'
+NOT_FOUND = 'not_found'
+SELF = 'self'
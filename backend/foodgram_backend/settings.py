@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,19 +80,76 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'foodgram_backend.wsgi.application'
+ASGI_APPLICATION = 'foodgram_backend.asgi.application'
+
+# wsgi: gunicorn sync workers, asgi: gunicorn uvicorn workers, hot read
+# endpoints are served by async views
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+ASYNC_VIEWS = SERVER_MODE == 'asgi'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# DB_POOL=True keeps a psycopg pool per worker process, otherwise each
+# thread keeps its connection for DB_CONN_MAX_AGE seconds. Persistent
+# connections are not reused by async views, use the pool in asgi mode.
+DB_POOL = os.getenv('DB_POOL') == 'True'
+DB_POOL_OPTIONS = {
+    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+    'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+}
+
+# DB_ENGINE=django.db.backends.sqlite3 runs the tests without PostgreSQL,
+# full text search and the EXPLAIN tests need PostgreSQL
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.postgresql')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': DB_ENGINE,
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', 'localhost'),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': (
+            0 if DB_POOL or ASYNC_VIEWS
+            else int(os.getenv('DB_CONN_MAX_AGE', 60))
+        ),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'pool': DB_POOL_OPTIONS} if DB_POOL else {},
+    }
+}
+if DB_ENGINE == 'django.db.backends.sqlite3':
+    DATABASES['default'] = {
+        'ENGINE': DB_ENGINE,
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+
+# Read replicas as comma separated hosts, safe requests read from them.
+# Listing DB_HOST itself tries the routing locally on one database.
+DB_REPLICAS = []
+for index, host in enumerate(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1):
+    DB_REPLICAS.append(f'replica{index}')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['utils.db_router.ReplicaRouter'] if DB_REPLICAS else []
+DB_STICKY_SECONDS = int(os.getenv('DB_STICKY_SECONDS', 10))
+
+# docker-compose shares Redis between workers, locmem only suits a single
+# development process
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
@@ -149,12 +208,31 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 6,
 }
 
+SHOPPING_LIST_CACHE_SIZE = int(os.getenv('SHOPPING_LIST_CACHE_SIZE', 256))
+SHOPPING_LIST_CACHE_TTL = int(os.getenv('SHOPPING_LIST_CACHE_TTL', 60 * 60))
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 1024))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 60))
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+IMAGE_VARIANT_SIZES = {'small': 320, 'medium': 960}
+
+# workers dump metrics to this directory so that a scrape of any worker
+# returns all of them, gunicorn.conf.py sets it for several workers
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_DUMP_SECONDS = int(os.getenv('METRICS_DUMP_SECONDS', 5))
+
+RECIPES_CACHE_TIMEOUT = int(os.getenv('RECIPES_CACHE_TIMEOUT', 5 * 60))
+REFERENCE_DATA_TTL = int(os.getenv('REFERENCE_DATA_TTL', 5 * 60))
+# users following more authors get a precomputed feed, limited to the
+# FEED_SIZE newest recipes
+FEED_FANOUT_THRESHOLD = int(os.getenv('FEED_FANOUT_THRESHOLD', 100))
+FEED_SIZE = int(os.getenv('FEED_SIZE', 1000))
+
 DJOSER = {
     'HIDE_USERS': False,
     'SERIALIZERS': {
@@ -14,13 +14,23 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 
+from api.async_views import AsyncShortLinkRedirectRecipeView
+from api.metrics import metrics_view
 from api.views import ShortLinkRedirectRecipeView
 
+short_link_view = (
+    AsyncShortLinkRedirectRecipeView if settings.ASYNC_VIEWS
+    else ShortLinkRedirectRecipeView
+)
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
-    path('s/<slug:slug>/', ShortLinkRedirectRecipeView.as_view())
+    path('s/<slug:slug>/', short_link_view.as_view(), name='short_link'),
+    # not proxied by the gateway, scraped from the internal network
+    path('metrics/', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,31 @@
+import os
+import tempfile
+from pathlib import Path
+
+bind = '0.0.0.0:8000'
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+
+if os.getenv('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'foodgram_backend.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'foodgram_backend.wsgi:application'
+
+# a scrape reaches one worker, workers share their metrics in a directory
+if workers > 1:
+    os.environ.setdefault(
+        'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'foodgram_metrics')
+    )
+metrics_dir = os.getenv('METRICS_DIR')
+
+
+def on_starting(server):
+    if metrics_dir:
+        Path(metrics_dir).mkdir(parents=True, exist_ok=True)
+        for path in Path(metrics_dir).glob('*.json'):
+            path.unlink()
+
+
+def child_exit(server, worker):
+    if metrics_dir:
+        Path(metrics_dir, f'{worker.pid}.json').unlink(missing_ok=True)
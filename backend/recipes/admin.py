@@ -39,17 +39,15 @@ class IngredientsRecipesAdmin(admin.ModelAdmin):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'author__username', 'favorite_count')
+    list_display = (
+        'id', 'name', 'author__username', 'favorites_count',
+        'shopping_cart_count'
+    )
     search_fields = ('author__username', 'name',)
     list_display_links = ('id', 'name')
     list_filter = ('tags__name',)
     inlines = [TagsRecipesInline]
 
-    def favorite_count(self, obj):
-        return obj.favorite_recipes.count()
-    favorite_count.admin_order_field = 'favorite_recipes'
-    favorite_count.short_description = 'Добавлений в избранное'
-
 
 @admin.register(TagsRecipes)
 class TagsRecipesAdmin(admin.ModelAdmin):
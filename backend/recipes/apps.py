@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        from utils.images import connect_image_variants
+
+        from .counters import connect_counters
+        from .feed import connect_feed
+        from .models import Recipe
+        from .search import connect_search
+        connect_counters()
+        connect_feed()
+        connect_search()
+        connect_image_variants(Recipe, 'image', 'image_variants')
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save
+
+from users.models import Subscriber
+
+from .models import FavoriteRecipes, Recipe, ShoppingCart
+
+User = get_user_model()
+
+# (row model, its foreign key, counted model, counter field)
+COUNTERS = (
+    (FavoriteRecipes, 'recipe', Recipe, 'favorites_count'),
+    (ShoppingCart, 'recipe', Recipe, 'shopping_cart_count'),
+    (Recipe, 'author', User, 'recipes_count'),
+    (Subscriber, 'subscriber', User, 'followers_count'),
+    (Subscriber, 'user', User, 'subscriptions_count'),
+)
+
+
+def change_counter(model, pk, field, delta):
+    """shift counter in the current transaction, never below zero"""
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def count_created(row_model, objects):
+    """
+    Recount rows after bulk_create, which sends no post_save.
+
+    Conflicting rows are skipped without notice, so the counters of the
+    touched objects are set from the table, call it in the transaction
+    of the insert.
+    """
+    for counted_model, foreign_key, model, field in COUNTERS:
+        if counted_model is not row_model:
+            continue
+        attname = row_model._meta.get_field(foreign_key).attname
+        ids = {getattr(obj, attname) for obj in objects}
+        if ids:
+            model.objects.filter(pk__in=ids).update(
+                **{field: actual_count(row_model, foreign_key)}
+            )
+
+
+def connect_counters():
+    for row_model, foreign_key, model, field in COUNTERS:
+        attname = row_model._meta.get_field(foreign_key).attname
+
+        def increment(instance, created, model=model, field=field,
+                      attname=attname, **kwargs):
+            if created:
+                change_counter(model, getattr(instance, attname), field, 1)
+
+        def decrement(instance, model=model, field=field, attname=attname,
+                      **kwargs):
+            change_counter(model, getattr(instance, attname), field, -1)
+
+        uid = f'{row_model.__name__}.{field}'
+        post_save.connect(
+            increment, sender=row_model, weak=False, dispatch_uid=uid
+        )
+        post_delete.connect(
+            decrement, sender=row_model, weak=False, dispatch_uid=uid
+        )
+
+
+def actual_count(row_model, foreign_key):
+    return Coalesce(Subquery(
+        row_model.objects.filter(**{foreign_key: OuterRef('pk')})
+        .order_by().values(foreign_key).annotate(count=Count('pk'))
+        .values('count')
+    ), 0)
+
+
+def reconcile_counters():
+    """rewrite drifted counters, return {field: repaired rows}"""
+    repaired = {}
+    for row_model, foreign_key, model, field in COUNTERS:
+        actual = actual_count(row_model, foreign_key)
+        repaired[field] = model.objects.exclude(
+            **{field: actual}
+        ).update(**{field: actual})
+    return repaired
@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.db.models.signals import post_delete, post_save
+
+from users.models import Subscriber
+
+from .models import FeedEntry, Recipe
+
+User = get_user_model()
+
+
+def get_subscriptions_count(user_id):
+    """read from the row, request.user may predate the last subscribe"""
+    return User.objects.filter(pk=user_id).values_list(
+        'subscriptions_count', flat=True
+    ).first() or 0
+
+
+def get_feed_queryset(queryset, user):
+    """
+    Recipes of authors followed by user, newest first.
+
+    Users following up to FEED_FANOUT_THRESHOLD authors read them with
+    one query over the author index, heavier followers read the feed
+    entries written for them when a followed author adds a recipe.
+    Those feeds keep only the FEED_SIZE newest recipes, older pages
+    are empty.
+    """
+    if get_subscriptions_count(user.pk) > settings.FEED_FANOUT_THRESHOLD:
+        return queryset.filter(feed_entries__user=user).order_by('-id')
+    return queryset.filter(
+        author_id__in=user.users_ubscribers.values('subscriber_id')
+    ).order_by('-id')
+
+
+def limit(user_ids):
+    """delete feed entries of user_ids older than their FEED_SIZE newest"""
+    stale = list(FeedEntry.objects.filter(user_id__in=user_ids).annotate(
+        position=Window(
+            RowNumber(), partition_by=F('user_id'),
+            order_by=F('recipe_id').desc()
+        )
+    ).filter(position__gt=settings.FEED_SIZE).values_list('pk', flat=True))
+    if stale:
+        FeedEntry.objects.filter(pk__in=stale).delete()
+
+
+def backfill(user_id, author_ids=None):
+    """copy newest recipes of followed authors into the user feed"""
+    if author_ids is None:
+        author_ids = Subscriber.objects.filter(
+            user_id=user_id
+        ).values('subscriber_id')
+    recipe_ids = Recipe.objects.filter(
+        author_id__in=author_ids
+    ).order_by('-id').values_list('id', flat=True)[:settings.FEED_SIZE]
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, recipe_id=pk) for pk in recipe_ids),
+        ignore_conflicts=True
+    )
+    limit([user_id])
+
+
+def follow(user_id, author_ids):
+    """fill feed of a heavy follower after new subscriptions"""
+    if not author_ids:
+        return
+    subscriptions = get_subscriptions_count(user_id)
+    if subscriptions <= settings.FEED_FANOUT_THRESHOLD:
+        return
+    if subscriptions - len(author_ids) <= settings.FEED_FANOUT_THRESHOLD:
+        # just crossed the threshold, the feed was served by the merge
+        # query until now and may lack older authors
+        backfill(user_id)
+    else:
+        backfill(user_id, author_ids)
+
+
+def fan_out(instance, created, **kwargs):
+    if not created:
+        return
+    user_ids = list(Subscriber.objects.filter(
+        subscriber_id=instance.author_id,
+        user__subscriptions_count__gt=settings.FEED_FANOUT_THRESHOLD
+    ).values_list('user_id', flat=True))
+    if not user_ids:
+        return
+    FeedEntry.objects.bulk_create(
+        FeedEntry(user_id=user_id, recipe=instance) for user_id in user_ids
+    )
+    limit(user_ids)
+
+
+def on_subscribe(instance, created, **kwargs):
+    if created:
+        follow(instance.user_id, [instance.subscriber_id])
+
+
+def trim(instance, **kwargs):
+    FeedEntry.objects.filter(
+        user_id=instance.user_id, recipe__author_id=instance.subscriber_id
+    ).delete()
+
+
+def connect_feed():
+    post_save.connect(fan_out, sender=Recipe, dispatch_uid='feed.fan_out')
+    post_save.connect(
+        on_subscribe, sender=Subscriber, dispatch_uid='feed.subscribe'
+    )
+    post_delete.connect(trim, sender=Subscriber, dispatch_uid='feed.trim')
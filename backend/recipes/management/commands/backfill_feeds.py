@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from recipes.feed import backfill
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the precomputed feeds of users following more than '
+        'FEED_FANOUT_THRESHOLD authors, run after deploying the feed or '
+        'lowering the threshold'
+    )
+
+    def handle(self, *args, **kwargs):
+        user_ids = User.objects.filter(
+            subscriptions_count__gt=settings.FEED_FANOUT_THRESHOLD
+        ).values_list('pk', flat=True)
+        filled = 0
+        for user_id in list(user_ids):
+            backfill(user_id)
+            filled += 1
+        self.stdout.write(f'{filled} feeds filled')
+        self.stdout.write(self.style.SUCCESS('Feeds are ready'))
@@ -1,50 +1,154 @@
+import csv
 import json
+import re
+from itertools import islice
+from pathlib import Path
+from time import monotonic
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
+from api import response_cache
+from api.reference_data import ingredient_index, tags_data
 from recipes.models import Ingredient, Tag
 
+FORMATS = ('json', 'ndjson', 'csv')
+CHUNK_SIZE = 64 * 1024
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def iter_json_array(file):
+    """yield items of a top level JSON array without loading the file"""
+    decoder = json.JSONDecoder()
+    buffer = file.read(CHUNK_SIZE)
+    position = SEPARATORS.match(buffer).end()
+    if not buffer.startswith('[', position):
+        raise CommandError('Expected a JSON array')
+    position += 1
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if not (chunk := file.read(CHUNK_SIZE)):
+                raise
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+
+
+def iter_ndjson(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+READERS = {
+    'json': iter_json_array,
+    'ndjson': iter_ndjson,
+    'csv': csv.DictReader,
+}
+
 
 class Command(BaseCommand):
-    help = 'Import data from Json files into the database'
+    help = 'Import ingredients and tags from JSON, NDJSON or CSV files'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
         path = settings.BASE_DIR / 'static' / 'data'
-        try:
-            data_ingredients = (
-                path / 'ingredients.json'
-            )
-            self.import_ingredients(data_ingredients)
-            data_tags = (
-                path / 'tags.json'
-            )
-            self.import_tags(data_tags)
+        parser.add_argument(
+            '--ingredients', default=str(path / 'ingredients.json'),
+            help='Ingredients file, empty string to skip'
+        )
+        parser.add_argument(
+            '--tags', default=str(path / 'tags.json'),
+            help='Tags file, empty string to skip'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Input format, detected from file extension by default'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
 
+    def handle(self, *args, **options):
+        self.format = options['format']
+        self.batch_size = options['batch_size']
+        try:
+            if options['ingredients']:
+                self.import_ingredients(Path(options['ingredients']))
+            if options['tags']:
+                self.import_tags(Path(options['tags']))
         except Exception as e:
             raise CommandError(f'Error importing data: {e}')
+        finally:
+            transaction.on_commit(self.invalidate_caches)
 
         self.stdout.write(self.style.SUCCESS('Successfully imported data'))
 
-    def get_file(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
+    def invalidate_caches(self):
+        """
+        bulk_create sends no signals, drop what the receivers would.
+
+        Search vectors stay as they are: conflicting ingredients are
+        skipped, so no ingredient used by a recipe changes its name.
+        """
+        ingredient_index.invalidate()
+        tags_data.invalidate()
+        response_cache.invalidate()
+
+    def get_rows(self, file, file_path):
+        file_format = self.format or file_path.suffix.lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Unknown format of {file_path}')
+        return READERS[file_format](file)
+
+    def import_file(self, file_path, model, make_objects, **bulk_options):
+        """stream file_path into model in batches, report progress"""
+        before = model.objects.count()
+        rows = 0
+        started = monotonic()
+        with open(file_path, 'r', encoding='utf-8', newline='') as file:
+            items = self.get_rows(file, file_path)
+            while batch := list(islice(items, self.batch_size)):
+                with transaction.atomic():
+                    model.objects.bulk_create(
+                        make_objects(batch), **bulk_options
+                    )
+                rows += len(batch)
+                self.stdout.write(
+                    f'{model.__name__}: {rows} rows, '
+                    f'{rows / (monotonic() - started):.0f} rows/s',
+                    ending='\r'
+                )
+        created = model.objects.count() - before
+        self.stdout.write(
+            f'{model.__name__}: {rows} rows read, {created} created '
+            f'in {monotonic() - started:.1f}s'
+        )
 
     def import_ingredients(self, file_path):
-        data = self.get_file(file_path)
-        with transaction.atomic():
-            for item in data:
-                Ingredient.objects.create(
+        self.import_file(
+            file_path, Ingredient,
+            lambda batch: [
+                Ingredient(
                     name=item['name'],
                     measurement_unit=item['measurement_unit']
-                )
+                ) for item in batch
+            ],
+            ignore_conflicts=True
+        )
 
     def import_tags(self, file_path):
-        data = self.get_file(file_path)
-        with transaction.atomic():
-            for item in data:
-                Tag.objects.create(
-                    name=item['name'],
-                    slug=item['slug']
-                )
+        self.import_file(
+            file_path, Tag,
+            lambda batch: list({
+                item['slug']: Tag(name=item['name'], slug=item['slug'])
+                for item in batch
+            }.values()),
+            update_conflicts=True,
+            unique_fields=['slug'],
+            update_fields=['name']
+        )
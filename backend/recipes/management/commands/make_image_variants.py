@@ -0,0 +1,45 @@
+from time import sleep
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from utils.images import get_pending, make_variants
+
+User = get_user_model()
+
+IMAGES = (
+    (Recipe, 'image', 'image_variants'),
+    (User, 'avatar', 'avatar_variants'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Render missing resized variants of recipe images and avatars, '
+        'including renders lost on a worker restart'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int,
+            help='Keep running, look for pending images every interval '
+                 'seconds'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.render()
+            if not options['interval']:
+                break
+            sleep(options['interval'])
+
+    def render(self):
+        for model, field_name, variants_field in IMAGES:
+            pending = get_pending(model, field_name, variants_field)
+            rendered = 0
+            for pk in list(pending.values_list('pk', flat=True)):
+                make_variants(model, pk, field_name, variants_field)
+                rendered += 1
+            self.stdout.write(f'{model.__name__}: {rendered} rendered')
+        self.stdout.write(self.style.SUCCESS('Image variants are ready'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount denormalized favorites, cart, recipes and followers'
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            repaired = reconcile_counters()
+        for field, rows in repaired.items():
+            self.stdout.write(f'{field}: {rows} rows repaired')
+        self.stdout.write(self.style.SUCCESS('Counters reconciled'))
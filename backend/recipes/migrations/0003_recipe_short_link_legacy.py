@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='short_link',
+            field=models.CharField(blank=True, help_text='Устаревшая ссылка, новые вычисляются из id рецепта.', max_length=10, null=True, unique=True, verbose_name='Короткая ссылка'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:35
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('recipes', 'FavoriteRecipes', 'recipe', 'recipes', 'Recipe',
+     'favorites_count'),
+    ('recipes', 'ShoppingCart', 'recipe', 'recipes', 'Recipe',
+     'shopping_cart_count'),
+    ('recipes', 'Recipe', 'author', 'users', 'User', 'recipes_count'),
+    ('users', 'Subscriber', 'subscriber', 'users', 'User', 'followers_count'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for app, row_name, foreign_key, model_app, model_name, field in COUNTERS:
+        row_model = apps.get_model(app, row_name)
+        model = apps.get_model(model_app, model_name)
+        model.objects.update(**{field: Coalesce(Subquery(
+            row_model.objects.filter(**{foreign_key: OuterRef('pk')})
+            .order_by().values(foreign_key).annotate(count=Count('pk'))
+            .values('count')
+        ), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_short_link_legacy'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлений в избранное'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='shopping_cart_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлений в список покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 
@@ -77,13 +79,17 @@ class RecipeQuerySet(models.QuerySet):
         return self.select_related('author')
 
     def with_prefetch_data(self):
-        return self.prefetch_related('tags', 'ingredients')
+        return self.prefetch_related('tags', models.Prefetch(
+            'recipe_ingredients',
+            queryset=IngredientsRecipes.objects.select_related('ingredient')
+        ))
 
 
 class RecipeManager(models.Manager):
     def get_queryset(self):
         return (
             RecipeQuerySet(self.model)
+            .defer('search_vector')
             .with_related_data()
             .with_prefetch_data()
         )
@@ -102,6 +108,12 @@ class Recipe(models.Model):
         verbose_name='Изображение',
         upload_to='recipes/images/',
     )
+    image_variants = models.JSONField(
+        verbose_name='Уменьшенные копии изображения',
+        default=dict,
+        blank=True,
+        editable=False
+    )
     name = models.CharField(
         verbose_name='Название',
         max_length=MAX_256,
@@ -119,7 +131,25 @@ class Recipe(models.Model):
     short_link = models.CharField(
         verbose_name='Короткая ссылка',
         max_length=10,
-        unique=True
+        unique=True,
+        blank=True,
+        null=True,
+        help_text='Устаревшая ссылка, новые вычисляются из id рецепта.'
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в избранное',
+        default=0,
+        editable=False
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в список покупок',
+        default=0,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False
     )
     objects = models.Manager()
     with_related = RecipeManager()
@@ -138,6 +168,14 @@ class Recipe(models.Model):
                 name='unique_author_name'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', '-id'], name='recipe_author_id_idx'
+            ),
+            GinIndex(
+                fields=['search_vector'], name='recipe_search_vector_idx'
+            ),
+        ]
 
 
 class TagsRecipes(models.Model):
@@ -172,6 +210,11 @@ class ShoppingCart(models.Model):
                 name='unique_shopping_cart_user_recipe'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'user'], name='shopping_cart_recipe_user_idx'
+            ),
+        ]
 
 
 class FavoriteRecipes(models.Model):
@@ -188,3 +231,24 @@ class FavoriteRecipes(models.Model):
                 name='unique_favorites_user_recipe'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'user'], name='favorites_recipe_user_idx'
+            ),
+        ]
+
+
+class FeedEntry(models.Model):
+    """Recipe of a followed author, stored for users following many."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
+
+    class Meta:
+        default_related_name = 'feed_entries'
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_feed_user_recipe'
+            )
+        ]
@@ -0,0 +1,123 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+from django.db.models.signals import post_delete, post_save
+
+from common.constants import SEARCH_CONFIG
+
+from .models import Ingredient, IngredientsRecipes, Recipe
+
+SEARCH_FIELDS = {'name', 'text'}
+
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+
+def get_search_vector():
+    """weighted tsvector of recipe name, text and ingredient names"""
+    ingredient_names = IngredientsRecipes.objects.filter(
+        recipe=OuterRef('pk')
+    ).order_by().values('recipe').annotate(
+        names=StringAgg('ingredient__name', ' ')
+    ).values('names')
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(
+            Subquery(ingredient_names), weight='C', config=SEARCH_CONFIG
+        )
+    )
+
+
+def update_search_vector(queryset):
+    if is_supported():
+        queryset.update(search_vector=get_search_vector())
+
+
+def search(queryset, value):
+    """
+    Recipes matching value, best ranked first.
+
+    Uses the GIN indexed search_vector on PostgreSQL, other backends
+    fall back to unranked icontains over the same fields.
+    """
+    if not is_supported():
+        return queryset.filter(
+            Q(name__icontains=value) | Q(text__icontains=value)
+            | Exists(IngredientsRecipes.objects.filter(
+                recipe=OuterRef('pk'), ingredient__name__icontains=value
+            ))
+        )
+    query = SearchQuery(value, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query)
+    ).order_by('-rank', '-id')
+
+
+class SearchUpdate:
+    """on commit callback updating the vectors of collected recipes"""
+
+    def __init__(self):
+        self.recipe_ids = set()
+
+    def __call__(self):
+        update_search_vector(Recipe.objects.filter(pk__in=self.recipe_ids))
+
+
+def update_on_commit(recipe_ids):
+    """
+    update search vectors of recipe_ids after the transaction commits.
+
+    Recipes changed in one transaction share a single UPDATE, however
+    many of their rows were saved or deleted.
+    """
+    if not is_supported():
+        return
+    for _, callback, _ in transaction.get_connection().run_on_commit:
+        if isinstance(callback, SearchUpdate):
+            callback.recipe_ids.update(recipe_ids)
+            return
+    callback = SearchUpdate()
+    callback.recipe_ids.update(recipe_ids)
+    transaction.on_commit(callback)
+
+
+def on_recipe_save(instance, update_fields=None, **kwargs):
+    # ingredients are written after the recipe row, so wait for commit
+    if update_fields and not SEARCH_FIELDS & set(update_fields):
+        return
+    update_on_commit([instance.pk])
+
+
+def on_recipe_ingredient_change(instance, origin=None, **kwargs):
+    """ingredient rows saved or deleted one by one, as admin inlines do"""
+    if isinstance(origin, Recipe) or getattr(origin, 'model', None) is Recipe:
+        # rows deleted with their recipe, there is no vector to update
+        return
+    update_on_commit([instance.recipe_id])
+
+
+def on_ingredient_save(instance, created, **kwargs):
+    if created:
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: update_search_vector(
+        Recipe.objects.filter(ingredients=pk)
+    ))
+
+
+def connect_search():
+    post_save.connect(
+        on_recipe_save, sender=Recipe, dispatch_uid='search.recipe'
+    )
+    post_save.connect(
+        on_ingredient_save, sender=Ingredient, dispatch_uid='search.ingredient'
+    )
+    for signal in (post_save, post_delete):
+        signal.connect(
+            on_recipe_ingredient_change, sender=IngredientsRecipes,
+            dispatch_uid='search.recipe_ingredient'
+        )
@@ -3,7 +3,12 @@ from django.contrib.auth.admin import UserAdmin
 
 from .models import Subscriber, User
 
-admin.site.register(User, UserAdmin)
+
+@admin.register(User)
+class CustomUserAdmin(UserAdmin):
+    list_display = UserAdmin.list_display + (
+        'recipes_count', 'followers_count', 'subscriptions_count'
+    )
 
 
 @admin.register(Subscriber)
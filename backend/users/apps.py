@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from utils.images import connect_image_variants
+
+        from .models import User
+        connect_image_variants(User, 'avatar', 'avatar_variants')
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:53
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_subscriptions_count(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Subscriber = apps.get_model('users', 'Subscriber')
+    User.objects.update(subscriptions_count=Coalesce(Subquery(
+        Subscriber.objects.filter(user=OuterRef('pk'))
+        .order_by().values('user').annotate(count=Count('pk'))
+        .values('count')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_avatar_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='subscriptions_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписок'),
+        ),
+        migrations.RunPython(
+            fill_subscriptions_count, migrations.RunPython.noop
+        ),
+    ]
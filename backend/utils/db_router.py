@@ -0,0 +1,90 @@
+import random
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from hashlib import sha256
+from threading import Lock
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = 'primary'
+REPLICA = 'replica'
+STICKY = 'sticky'
+WRITE = 'write'
+
+# (route, alias) for reads of the request being served, None outside
+# requests, so commands and background tasks stay on the primary
+read_route = ContextVar('read_route', default=None)
+routes = Counter()
+_lock = Lock()
+
+
+def get_sticky_key(request):
+    """cache key of request credentials, None for anonymous requests"""
+    identity = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not identity:
+        return None
+    return f'replica:sticky:{sha256(identity.encode()).hexdigest()}'
+
+
+def is_safe(request):
+    return request.method in SAFE_METHODS
+
+
+def get_route(request, sticky):
+    """return (route, alias) for reads of request and count the route"""
+    if not is_safe(request):
+        route = WRITE, DEFAULT_DB_ALIAS
+    elif sticky:
+        route = STICKY, DEFAULT_DB_ALIAS
+    else:
+        # one replica per request, so its reads share the same lag
+        route = REPLICA, random.choice(settings.DB_REPLICAS)
+    with _lock:
+        routes[route[0]] += 1
+    return route
+
+
+def is_write(request, response):
+    return not is_safe(request) and response.status_code < 400
+
+
+@contextmanager
+def primary_reads():
+    """read from the primary inside a request, for rows just written"""
+    if read_route.get() is None:
+        yield
+        return
+    token = read_route.set((PRIMARY, DEFAULT_DB_ALIAS))
+    try:
+        yield
+    finally:
+        read_route.reset(token)
+
+
+def get_route_stats():
+    """return {route: requests} served by this process"""
+    with _lock:
+        return dict(routes)
+
+
+class ReplicaRouter:
+    """Reads of safe requests go to a replica, everything else to primary."""
+
+    def db_for_read(self, model, **hints):
+        if (route := read_route.get()) is None:
+            return DEFAULT_DB_ALIAS
+        return route[1]
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,46 @@
+from collections import Counter
+from threading import Lock
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+connects = Counter()
+_lock = Lock()
+
+
+@receiver(connection_created)
+def count_connect(sender, connection, **kwargs):
+    with _lock:
+        connects[connection.alias] += 1
+
+
+def get_pool_stats(alias):
+    """return connection stats of this process for database alias"""
+    wrapper = connections[alias]
+    stats = {
+        'alias': alias,
+        'connects': connects[alias],
+        'conn_max_age': wrapper.settings_dict['CONN_MAX_AGE'],
+    }
+    if (pool := getattr(wrapper, 'pool', None)) is None:
+        return stats
+    pool_stats = pool.get_stats()
+    stats.update(
+        size=pool_stats.get('pool_size', 0),
+        max_size=pool_stats.get('pool_max', 0),
+        in_use=(
+            pool_stats.get('pool_size', 0)
+            - pool_stats.get('pool_available', 0)
+        ),
+        waiting=pool_stats.get('requests_waiting', 0),
+        created=pool_stats.get('connections_num', 0),
+        errors=pool_stats.get('connections_errors', 0),
+        lost=pool_stats.get('connections_lost', 0),
+    )
+    return stats
+
+
+def get_all_pool_stats():
+    return [get_pool_stats(alias) for alias in settings.DATABASES]
@@ -0,0 +1,138 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.fields.json import KT
+from django.db.models.signals import post_delete, post_save
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+SOURCE = 'source'
+FORMATS = {'jpg': 'JPEG', 'webp': 'WEBP'}
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS, thread_name_prefix='image-variants'
+)
+
+
+def get_variant_key(size_name, extension):
+    return f'{size_name}_{extension}'
+
+
+def render_variants(storage, name):
+    """save resized JPEG and WebP copies of image name, return their names"""
+    path = PurePosixPath(name)
+    variants = {SOURCE: name}
+    with storage.open(name) as file, Image.open(file) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for size_name, size in settings.IMAGE_VARIANT_SIZES.items():
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size))
+            for extension, image_format in FORMATS.items():
+                buffer = BytesIO()
+                thumbnail.save(buffer, image_format, quality=80)
+                variant_name = str(
+                    path.parent / 'variants'
+                    / f'{path.stem}_{size_name}.{extension}'
+                )
+                storage.delete(variant_name)
+                variants[get_variant_key(size_name, extension)] = (
+                    storage.save(variant_name, ContentFile(buffer.getvalue()))
+                )
+    return variants
+
+
+def delete_variants(storage, variants, keep=()):
+    for key, name in (variants or {}).items():
+        if key != SOURCE and name not in keep:
+            storage.delete(name)
+
+
+def make_variants(model, pk, field_name, variants_field):
+    """build variants for current image of model object pk"""
+    try:
+        obj = model.objects.filter(pk=pk).first()
+        if obj is None or not (image := getattr(obj, field_name)):
+            return
+        old_variants = getattr(obj, variants_field)
+        variants = render_variants(image.storage, image.name)
+        updated = model.objects.filter(
+            pk=pk, **{field_name: image.name}
+        ).exists()
+        if not updated:
+            delete_variants(image.storage, variants)
+            return
+        setattr(obj, variants_field, variants)
+        obj.save(update_fields=[variants_field])
+        delete_variants(
+            image.storage, old_variants, keep=set(variants.values())
+        )
+    except Exception:
+        logger.exception(
+            'Image variants failed for %s %s', model.__name__, pk
+        )
+
+
+def make_variants_task(*args):
+    """make_variants in a pool thread, which owns its db connection"""
+    try:
+        make_variants(*args)
+    finally:
+        connection.close()
+
+
+def needs_variants(obj, field_name, variants_field):
+    image = getattr(obj, field_name)
+    variants = getattr(obj, variants_field) or {}
+    return bool(image) and variants.get(SOURCE) != image.name
+
+
+def get_pending(model, field_name, variants_field):
+    """
+    objects with an image but no variants of it.
+
+    The variants remember their source image, so a render lost with the
+    process that scheduled it stays pending in the database until the
+    make_image_variants command renders it.
+    """
+    return model.objects.exclude(
+        Q(**{f'{field_name}__isnull': True}) | Q(**{field_name: ''})
+    ).annotate(
+        variants_source=KT(f'{variants_field}__{SOURCE}')
+    ).filter(
+        Q(variants_source__isnull=True) | ~Q(variants_source=F(field_name))
+    )
+
+
+def connect_image_variants(model, field_name, variants_field):
+    """render variants in background after each commit changing image"""
+
+    def schedule(instance, update_fields=None, **kwargs):
+        if update_fields and field_name not in update_fields:
+            return
+        if not getattr(instance, field_name) and getattr(
+                instance, variants_field):
+            cleanup(instance)
+            model.objects.filter(pk=instance.pk).update(
+                **{variants_field: {}}
+            )
+            setattr(instance, variants_field, {})
+        elif needs_variants(instance, field_name, variants_field):
+            args = (model, instance.pk, field_name, variants_field)
+            transaction.on_commit(
+                lambda: executor.submit(make_variants_task, *args)
+            )
+
+    def cleanup(instance, **kwargs):
+        storage = model._meta.get_field(field_name).storage
+        delete_variants(storage, getattr(instance, variants_field))
+
+    uid = f'{model.__name__}.{variants_field}'
+    post_save.connect(schedule, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(cleanup, sender=model, weak=False, dispatch_uid=uid)
@@ -0,0 +1,198 @@
+import json
+import os
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from threading import Lock, get_ident
+from time import perf_counter
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf')
+)
+PREFIX = 'foodgram'
+
+
+class RequestStats:
+    __slots__ = ('queries', 'query_time', 'started')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.started = perf_counter()
+
+
+# stats of the request being served, shared with sync_to_async threads
+current_stats = ContextVar('current_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    if (stats := current_stats.get()) is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_time += perf_counter() - started
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def connect_query_metrics():
+    connection_created.connect(
+        install_query_wrapper, dispatch_uid='query_metrics'
+    )
+
+
+def format_labels(labels):
+    return ','.join(
+        '{}="{}"'.format(
+            key, str(value).replace('\\', '\\\\').replace('"', '\\"')
+        )
+        for key, value in labels.items()
+    )
+
+
+class Metrics:
+    """
+    Per-process request metrics rendered in Prometheus text format.
+
+    With METRICS_DIR set every worker dumps its samples there and
+    the worker answering a scrape renders the samples of all workers.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.dumped = 0.0
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+        self.latency_sum = defaultdict(float)
+        self.queries = defaultdict(int)
+        self.query_time = defaultdict(float)
+        self.response_size = defaultdict(int)
+        self.collectors = []
+
+    def observe(self, view, action, method, status, stats, size):
+        duration = perf_counter() - stats.started
+        key = (view, action)
+        bucket = next(
+            index for index, bound in enumerate(LATENCY_BUCKETS)
+            if duration <= bound
+        )
+        with self._lock:
+            self.requests[(view, action, method, status)] += 1
+            self.latency[key][bucket] += 1
+            self.latency_sum[key] += duration
+            self.queries[key] += stats.queries
+            self.query_time[key] += stats.query_time
+            self.response_size[key] += size
+        if (settings.METRICS_DIR and perf_counter() - self.dumped
+                > settings.METRICS_DUMP_SECONDS):
+            self.dump()
+
+    @property
+    def worker(self):
+        return str(os.getpid())
+
+    def add_collector(self, collector):
+        """collector returns (name, type, help, [(labels, value)])"""
+        self.collectors.append(collector)
+
+    def get_families(self):
+        def labels(view, action, **extra):
+            return {'view': view, 'action': action, **extra}
+
+        with self._lock:
+            yield ('http_requests_total', 'counter', 'Requests served', [
+                (labels(view, action, method=method, status=status), value)
+                for (view, action, method, status), value
+                in self.requests.items()
+            ])
+            histogram = []
+            for (view, action), counts in self.latency.items():
+                total = 0
+                for bound, count in zip(LATENCY_BUCKETS, counts):
+                    total += count
+                    le = '+Inf' if bound == float('inf') else str(bound)
+                    histogram.append(
+                        ('_bucket', labels(view, action, le=le), total)
+                    )
+                histogram.append(('_count', labels(view, action), total))
+                histogram.append((
+                    '_sum', labels(view, action),
+                    self.latency_sum[(view, action)]
+                ))
+            yield (
+                'http_request_duration_seconds', 'histogram',
+                'Request latency', histogram
+            )
+            for name, help_text, values in (
+                ('db_queries_total', 'Database queries', self.queries),
+                ('db_query_duration_seconds_total', 'Database query time',
+                 self.query_time),
+                ('http_response_size_bytes_total', 'Response body bytes',
+                 self.response_size),
+            ):
+                yield name, 'counter', help_text, [
+                    (labels(*key), value) for key, value in values.items()
+                ]
+        for collector in self.collectors:
+            yield from collector()
+
+    def get_samples(self):
+        """families with every sample as (suffix, labels, value)"""
+        return [
+            (f'{PREFIX}_{name}', metric_type, help_text, [
+                (suffix, {'worker': self.worker, **labels}, value)
+                for suffix, labels, value in (
+                    sample if len(sample) == 3 else ('', *sample)
+                    for sample in samples
+                )
+            ])
+            for name, metric_type, help_text, samples in self.get_families()
+        ]
+
+    def dump(self):
+        self.dumped = perf_counter()
+        path = Path(settings.METRICS_DIR, f'{self.worker}.json')
+        temporary = path.with_suffix(f'.{get_ident()}.tmp')
+        temporary.write_text(json.dumps(self.get_samples()))
+        temporary.replace(path)
+
+    def load(self):
+        """samples of all workers dumped to METRICS_DIR"""
+        self.dump()
+        families = {}
+        for path in Path(settings.METRICS_DIR).glob('*.json'):
+            try:
+                dumped = json.loads(path.read_text())
+            except (OSError, ValueError):
+                # the worker exited since the glob
+                continue
+            for name, metric_type, help_text, samples in dumped:
+                families.setdefault(
+                    name, (metric_type, help_text, [])
+                )[2].extend(samples)
+        return [(name, *family) for name, family in families.items()]
+
+    def render(self):
+        lines = []
+        for name, metric_type, help_text, samples in (
+            self.load() if settings.METRICS_DIR else self.get_samples()
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for suffix, labels, value in samples:
+                lines.append(
+                    f'{name}{suffix}{{{format_labels(labels)}}} {value}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
@@ -1,4 +1,7 @@
+from io import BytesIO
+
 from django.conf import settings
+from PIL import Image
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.pdfbase import pdfmetrics
@@ -11,11 +14,22 @@ file_path = settings.BASE_DIR / 'utils' / 'pdf_gen'
 pdfmetrics.registerFont(TTFont('regular', fonts_path / 'Kanit-Cyrillic.ttf'))
 
 
+def load_image(path):
+    """decode image once per process, inline images are drawn as RGB"""
+    with Image.open(path) as image:
+        return image.convert('RGB')
+
+
+LOGO = load_image(file_path / 'Logo.png')
+FAVICON = load_image(file_path / 'favicon.png')
+FILE_NAME = 'ShoppingCatrt.pdf'
+
+
 def write_pdf(pdf, data):
     x, y = 40 * mm, 210 * mm
     page_number = 1
     pdf.setFont('regular', 10)
-    for ingridient in data:
+    for name, measurement_unit, amount in data:
         if y <= 10:
             pdf.setFont('regular', 5)
             pdf.drawString(5, 5, f'Стр. {page_number}')
@@ -23,18 +37,17 @@ def write_pdf(pdf, data):
             pdf.showPage()
             pdf.setFont('regular', 10)
             y = 290 * mm
-        pdf.drawString(x, y, (
-            f'{ingridient.name}, '
-            f'{data[ingridient]}({ingridient.measurement_unit})')
-        )
+        pdf.drawString(x, y, f'{name}, {amount}({measurement_unit})')
         pdf.rect(x - 7 * mm, y - 1 * mm, 5 * mm, 5 * mm, fill=0)
         y -= 10 * mm
 
 
 def get_pdf(data):
-    pdf = canvas.Canvas(filename='ShoppingCatrt.pdf', pagesize=A4)
-    pdf.drawInlineImage(f'{file_path}/Logo.png', 100 * mm, 0)
-    pdf.drawInlineImage(f'{file_path}/favicon.png', 0, 260 * mm)
+    """return rendered pdf as bytes"""
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    pdf.drawInlineImage(LOGO, 100 * mm, 0)
+    pdf.drawInlineImage(FAVICON, 0, 260 * mm)
     pdf.setFont('regular', 20)
     pdf.drawString(50 * mm, 240 * mm, 'Список покупок для рецептов')
     pdf.setFont('regular', 15)
@@ -42,4 +55,4 @@ def get_pdf(data):
         f'Всего к покупке: {len(data)} ингридиент(a-ов)'))
     write_pdf(pdf, data)
     pdf.save()
-    return pdf._filename
+    return buffer.getvalue()
@@ -1,22 +1,27 @@
-import random
+DICTIONARY = 'ABCDEFGHJKLMNOPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz234567890'
+BASE = len(DICTIONARY)
+# Random links stored in Recipe.short_link before ids were encoded.
+LEGACY_LINK_LENGTH = 10
 
-from recipes.models import Recipe
 
+def get_link(recipe_id):
+    """return short link encoding the recipe id"""
+    link = ''
+    while True:
+        recipe_id, index = divmod(recipe_id, BASE)
+        link = DICTIONARY[index] + link
+        if not recipe_id:
+            return link
 
-def check_unique(link):
-    try:
-        Recipe.objects.get(short_link=link)
-    except Recipe.DoesNotExist:
-        return link
-    return False
 
-
-def get_link():
-    dictionary = "ABCDEFGHJKLMNOPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz234567890"
-    length = 10
-    link = False
-    while not link:
-        link = check_unique(
-            ''.join(random.choice(dictionary) for _ in range(length))
-        )
-    return link
+def get_recipe_id(link):
+    """return recipe id encoded in link, None for legacy or invalid link"""
+    if len(link) >= LEGACY_LINK_LENGTH or (
+            len(link) > 1 and link[0] == DICTIONARY[0]):
+        return None
+    recipe_id = 0
+    for char in link:
+        if (index := DICTIONARY.find(char)) < 0:
+            return None
+        recipe_id = recipe_id * BASE + index
+    return recipe_id